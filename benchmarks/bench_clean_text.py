@@ -0,0 +1,85 @@
+# Parity check + rows/second benchmark: clean_text (per row) vs clean_text_series (vectorized)
+#
+#   python benchmarks/bench_clean_text.py                 # synthetic 311-style text
+#   python benchmarks/bench_clean_text.py --input 311.csv # real case_title/subject/closure_reason
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlp_complaints import NLP_COLUMNS, clean_text, clean_text_series
+
+
+SAMPLE_TITLES = [
+    "Request for Pothole Repair", "PRINTED - Street Light Outage", "Missed Trash/Recycling/Yard Waste/Bulk Item",
+    "Illegal Parking", "Needle Pickup", "Abandoned Vehicles", "Graffiti Removal", "Sidewalk Repair (Make Safe)",
+    "Rodent Activity", "Unsatisfactory Living Conditions", "Tree Maintenance Requests", "Café noise complaint",
+]
+SAMPLE_SUBJECTS = [
+    "Public Works Department", "Transportation - Traffic Division", "Mayor's 24 Hour Hotline",
+    "Inspectional Services", "Boston Police Department", "Parks & Recreation Department",
+]
+SAMPLE_REASONS = [
+    "Case Closed. Case Resolved. Completed 3/12/2021 10:41 AM", "Case Closed. Case Noted. duplicate of #101004421",
+    "Case Closed Case Invalid ", "See http://www.boston.gov/311?id=42 for details!!", "\tcrew   dispatched\n\n",
+    "Case Closed. Case Resolved. replaced bulb – 150W HPS", "", "N/A",
+]
+
+
+def synthetic_texts(rows, seed=7):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(rows):
+        title = rng.choice(SAMPLE_TITLES)
+        subject = rng.choice(SAMPLE_SUBJECTS)
+        reason = rng.choice(SAMPLE_REASONS + [float("nan")])
+        texts.append(f"{title} {subject} {reason}")
+    return pd.Series(texts)
+
+
+def csv_texts(path, rows):
+    df = pd.read_csv(path, usecols=NLP_COLUMNS[:3], dtype=str, nrows=rows)
+    return (
+        df["case_title"].astype(str) + " " +
+        df["subject"].astype(str) + " " +
+        df["closure_reason"].astype(str)
+    )
+
+
+def time_it(fn, texts, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(texts)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="clean_text parity check and benchmark")
+    parser.add_argument("--input", help="311 CSV to sample text from (default: synthetic)")
+    parser.add_argument("--rows", type=int, default=274_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = csv_texts(args.input, args.rows) if args.input else synthetic_texts(args.rows)
+
+    before_s, before = time_it(lambda t: t.apply(clean_text), texts, args.repeat)
+    after_s, after = time_it(clean_text_series, texts, args.repeat)
+
+    mismatches = (before != after).sum()
+    print(f"Rows: {len(texts)}")
+    print(f"clean_text (apply):   {len(texts) / before_s:,.0f} rows/s")
+    print(f"clean_text_series:    {len(texts) / after_s:,.0f} rows/s  ({before_s / after_s:.1f}x)")
+    print(f"Parity mismatches:    {mismatches}")
+
+    if mismatches:
+        print(pd.DataFrame({"before": before, "after": after})[before != after].head(10))
+        sys.exit(1)
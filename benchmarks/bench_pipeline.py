@@ -0,0 +1,223 @@
+# Per-stage benchmark of the complaint NLP pipeline
+# load → concat → clean → sentiment → priority → write, each timed separately,
+# on a synthetic 311-shaped CSV (or rows sampled from a real one) at several sizes.
+#
+#   python benchmarks/bench_pipeline.py                               # 10k, 100k, 1M synthetic rows
+#   python benchmarks/bench_pipeline.py --sizes 10000 --workers 4
+#   python benchmarks/bench_pipeline.py --input 311.csv --output runs/2021.json
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_clean_text import SAMPLE_REASONS, SAMPLE_SUBJECTS, SAMPLE_TITLES
+from nlp_complaints import (
+    NLP_COLUMNS,
+    NLP_DTYPES,
+    OUTPUT_FORMATS,
+    SentimentMemo,
+    clean_text_series,
+    open_output,
+    sentiment_pool,
+    sentiment_series,
+    urgency_score
+)
+
+try:
+    import resource
+except ImportError:           # Windows
+    resource = None
+
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+STAGES = ["load", "concat", "clean", "sentiment", "priority", "write"]
+
+DEPARTMENTS = ["PWDx", "BTDT", "ISD", "INFO", "PROP", "PARK", "BWSC", "GEN_"]
+SOURCES = ["Citizens Connect App", "Constituent Call", "Self Service", "Employee Generated"]
+NEIGHBORHOODS = ["Dorchester", "Roxbury", "South Boston", "Allston / Brighton", "Back Bay", "Jamaica Plain"]
+
+
+# ================= DATASET =================
+# Same columns as the Boston 311 export, so usecols/dtype pruning is measured honestly
+def synthetic_311(rows, seed=7):
+    rng = np.random.default_rng(seed)
+    opened = pd.Timestamp("2021-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 365 * 24 * 60, rows)), unit="m")
+    reasons = np.array(SAMPLE_REASONS + [""], dtype=object)
+    reasons[reasons == ""] = None
+
+    return pd.DataFrame({
+        "case_enquiry_id": np.arange(101003000000, 101003000000 + rows),
+        "open_dt": opened.strftime("%Y-%m-%d %H:%M:%S"),
+        "target_dt": (opened + pd.Timedelta(days=3)).strftime("%Y-%m-%d %H:%M:%S"),
+        "closed_dt": (opened + pd.Timedelta(hours=20)).strftime("%Y-%m-%d %H:%M:%S"),
+        "ontime": rng.choice(["ONTIME", "OVERDUE"], rows),
+        "case_status": rng.choice(["Closed", "Open"], rows, p=[0.85, 0.15]),
+        "closure_reason": rng.choice(reasons, rows),
+        "case_title": rng.choice(SAMPLE_TITLES, rows),
+        "subject": rng.choice(SAMPLE_SUBJECTS, rows),
+        "reason": rng.choice(["Street Cleaning", "Highway Maintenance", "Sanitation", "Enforcement & Abandoned Vehicles"], rows),
+        "type": rng.choice(["Requests for Street Cleaning", "Request for Pothole Repair", "Parking Enforcement"], rows),
+        "queue": rng.choice(["PWDx_District 03: North Dorchester", "BTDT_Parking Enforcement", "INFO_Mass DOT"], rows),
+        "department": rng.choice(DEPARTMENTS, rows),
+        "submittedphoto": None,
+        "closedphoto": None,
+        "location": rng.choice(["INTERSECTION of Washington St & Boylston St", "100 Beacon St  Boston  MA  02116"], rows),
+        "fire_district": rng.integers(1, 12, rows),
+        "pwd_district": rng.choice(["1A", "1B", "1C", "03", "04", "05", "06", "07", "08", "09", "10A", "10B"], rows),
+        "city_council_district": rng.integers(1, 10, rows),
+        "police_district": rng.choice(["A1", "B2", "B3", "C6", "C11", "D4", "D14", "E5", "E13", "E18"], rows),
+        "neighborhood": rng.choice(NEIGHBORHOODS, rows),
+        "neighborhood_services_district": rng.integers(1, 16, rows),
+        "ward": rng.choice([f"Ward {i}" for i in range(1, 23)], rows),
+        "precinct": rng.integers(100, 2300, rows),
+        "location_street_name": rng.choice(["Washington St", "Beacon St", "Blue Hill Ave", "Boylston St"], rows),
+        "location_zipcode": rng.choice([2116.0, 2118.0, 2119.0, 2121.0, 2124.0, np.nan], rows),
+        "latitude": rng.uniform(42.23, 42.40, rows),
+        "longitude": rng.uniform(-71.18, -70.99, rows),
+        "source": rng.choice(SOURCES, rows)
+    })
+
+
+def sampled_311(path, rows, seed=7):
+    df = pd.read_csv(path, low_memory=False)
+    if rows > len(df):
+        return df.sample(rows, replace=True, random_state=seed)
+    return df.sample(rows, random_state=seed)
+
+
+# ================= MEASUREMENT =================
+# Peak RSS during a stage: /proc sampler on Linux, process-lifetime ru_maxrss otherwise
+class PeakRss:
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self.running = False
+        self.thread = None
+
+    @staticmethod
+    def current():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            if resource is None:
+                return 0
+            scale = 1 if sys.platform == "darwin" else 1024
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    def _sample(self):
+        while self.running:
+            self.peak = max(self.peak, self.current())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current()
+        self.running = True
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.running = False
+        self.thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def measure(results, stage, rows, fn):
+    with PeakRss() as rss:
+        start = time.perf_counter()
+        value = fn()
+        seconds = time.perf_counter() - start
+
+    results[stage] = {
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+        "peak_rss_mb": round(rss.peak / 2**20, 1)
+    }
+    print(f"  {stage:<10} {seconds:9.3f} s {results[stage]['rows_per_sec'] or 0:14,.0f} rows/s {results[stage]['peak_rss_mb']:9.1f} MB")
+    return value
+
+
+# ================= RUN =================
+def run_size(csv_path, rows, workers, backend, fmt, out_dir):
+    results = {}
+
+    df_nlp = measure(results, "load", rows, lambda: pd.read_csv(csv_path, usecols=NLP_COLUMNS, dtype=NLP_DTYPES)[NLP_COLUMNS])
+
+    df_nlp["complaint_text"] = measure(results, "concat", rows, lambda: (
+        df_nlp["case_title"].astype(str) + " " +
+        df_nlp["subject"].astype(str) + " " +
+        df_nlp["closure_reason"].astype(str)
+    ))
+
+    df_nlp["clean_text"] = measure(results, "clean", rows, lambda: clean_text_series(df_nlp["complaint_text"]))
+
+    memo = SentimentMemo(backend=backend)
+    with sentiment_pool(workers) as pool:
+        df_nlp["sentiment"] = measure(results, "sentiment", rows,
+                                      lambda: sentiment_series(df_nlp["clean_text"], pool, workers, memo))
+
+    df_nlp["priority"] = measure(results, "priority", rows, lambda: df_nlp["sentiment"].apply(urgency_score))
+
+    # outputs go to a scratch directory, not over the real pipeline outputs
+    def write():
+        output = open_output(fmt, directory=out_dir)
+        output.write(df_nlp)
+        output.close()
+
+    measure(results, "write", rows, write)
+
+    results["sentiment"]["unique_texts"] = memo.lookups
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage benchmark of nlp_complaints.py")
+    parser.add_argument("--input", help="real 311 CSV to sample rows from (default: synthetic)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--backend", default="textblob")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv")
+    parser.add_argument("--output", default="bench_pipeline.json", help="JSON results file")
+    args = parser.parse_args()
+
+    report = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "input": args.input or "synthetic",
+        "workers": args.workers,
+        "backend": args.backend,
+        "format": args.format,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "stages": STAGES,
+        "runs": {}
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            print(f"Rows: {rows:,}")
+            df = sampled_311(args.input, rows) if args.input else synthetic_311(rows, seed=rows)
+            csv_path = os.path.join(tmp, f"311_{rows}.csv")
+            df.to_csv(csv_path, index=False)
+            del df
+
+            report["runs"][str(rows)] = run_size(csv_path, rows, args.workers, args.backend, args.format, tmp)
+            os.remove(csv_path)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Saved: ", args.output)
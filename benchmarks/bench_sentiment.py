@@ -0,0 +1,42 @@
+# Throughput of each sentiment backend behind score_batch
+#
+#   python benchmarks/bench_sentiment.py                  # synthetic 311-style text
+#   python benchmarks/bench_sentiment.py --input 311.csv  # real case_title/subject/closure_reason
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_clean_text import csv_texts, synthetic_texts
+from nlp_complaints import clean_text_series
+from streamlit_app.chatbot.sentiment import BACKENDS, get_scorer, score_batch
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentiment backend throughput")
+    parser.add_argument("--input", help="311 CSV to sample text from (default: synthetic)")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--backend", choices=BACKENDS, action="append", help="default: every backend")
+    args = parser.parse_args()
+
+    texts = csv_texts(args.input, args.rows) if args.input else synthetic_texts(args.rows)
+    texts = clean_text_series(texts).tolist()
+    print(f"Rows: {len(texts)}")
+
+    for backend in args.backend or BACKENDS:
+        start = time.perf_counter()
+        get_scorer(backend)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        labels = score_batch(texts, backend)
+        score_s = time.perf_counter() - start
+
+        negative = sum(sentiment == "NEGATIVE" for sentiment, _ in labels)
+        print(
+            f"{backend:<9} build {build_s * 1000:7.1f} ms   "
+            f"{len(texts) / score_s:10,.0f} rows/s   NEGATIVE {negative / len(texts):.1%}"
+        )
@@ -0,0 +1,155 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+from load_complaints import get_connection
+
+# Complaint hotspots: complaints binned into a fixed lat/lon grid..
+# cell_id is plain arithmetic on the coordinates (row * GRID_COLUMNS + col), so the
+# grid index never has to be built or stored. Counts per cell × department × sentiment
+# (priority follows sentiment) are built in one groupby and kept as a small table.
+
+HOTSPOTS_PATH = "complaint_hotspots.csv"
+
+CELL_SIZE = 0.005                                    # degrees, ~500 m
+GRID_COLUMNS = int(np.ceil(360 / CELL_SIZE))
+
+GROUP_COLUMNS = ["cell_id", "department", "sentiment", "priority"]
+HOTSPOT_COLUMNS = ["cell_id", "cell_lat", "cell_lon", "department", "sentiment", "priority", "complaints"]
+
+HOTSPOTS_DDL = """
+    CREATE TABLE IF NOT EXISTS complaint_hotspots (
+        cell_id BIGINT NOT NULL,
+        cell_lat DOUBLE NOT NULL,
+        cell_lon DOUBLE NOT NULL,
+        department VARCHAR(64) NOT NULL,
+        sentiment VARCHAR(16) NOT NULL,
+        priority VARCHAR(16) NOT NULL,
+        complaints INT NOT NULL,
+        PRIMARY KEY (cell_id, department, sentiment),
+        KEY idx_hotspots_priority (priority, complaints)
+    )
+"""
+
+INSERT_QUERY = """
+    INSERT INTO complaint_hotspots
+    (cell_id, cell_lat, cell_lon, department, sentiment, priority, complaints)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+# ================= GRID INDEX =================
+def grid_cells(latitude, longitude):
+    row = np.floor((np.asarray(latitude, dtype="float64") + 90) / CELL_SIZE)
+    col = np.floor((np.asarray(longitude, dtype="float64") + 180) / CELL_SIZE)
+    return row * GRID_COLUMNS + col                  # NaN where a coordinate is missing
+
+
+def cell_centers(cell_id):
+    cell_id = np.asarray(cell_id, dtype="int64")
+    row, col = np.divmod(cell_id, GRID_COLUMNS)
+    return (row + 0.5) * CELL_SIZE - 90, (col + 0.5) * CELL_SIZE - 180
+
+
+# ================= AGGREGATION =================
+def aggregate(df_nlp):
+    cells = pd.DataFrame({
+        "cell_id": grid_cells(df_nlp["latitude"], df_nlp["longitude"]),
+        "department": df_nlp["department"].astype(object).fillna("UNKNOWN").values,
+        "sentiment": df_nlp["sentiment"].astype(str).values,
+        "priority": df_nlp["priority"].astype(str).values
+    }).dropna(subset=["cell_id"])
+    cells["cell_id"] = cells["cell_id"].astype("int64")
+
+    return cells.groupby(GROUP_COLUMNS, sort=False).size().rename("complaints").reset_index()
+
+
+# add partial counts together (chunks, or a new run on top of an old table)..
+def merge(*counts):
+    merged = pd.concat([c[GROUP_COLUMNS + ["complaints"]] for c in counts], ignore_index=True)
+    merged = merged.groupby(GROUP_COLUMNS, sort=False)["complaints"].sum().reset_index()
+    merged["cell_lat"], merged["cell_lon"] = cell_centers(merged["cell_id"])
+    return merged[HOTSPOT_COLUMNS].sort_values("complaints", ascending=False, ignore_index=True)
+
+
+# "where are the high-priority complaints clustering" → a lookup on the small table
+def top_cells(hotspots, priority="HIGH", n=10):
+    cells = hotspots[hotspots["priority"] == priority]
+    return (
+        cells.groupby(["cell_id", "cell_lat", "cell_lon"])["complaints"].sum()
+        .nlargest(n)
+        .reset_index()
+    )
+
+
+def load_hotspots(path=HOTSPOTS_PATH):
+    return pd.read_csv(path, dtype={"cell_id": "int64", "department": str})
+
+
+# replace the whole table in one transaction (it's small)..
+def save_hotspots_db(hotspots):
+    rows = list(hotspots[HOTSPOT_COLUMNS].itertuples(index=False, name=None))
+    rows = [(int(r[0]), float(r[1]), float(r[2]), r[3], r[4], r[5], int(r[6])) for r in rows]
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(HOTSPOTS_DDL)
+            conn.begin()
+            cursor.execute("DELETE FROM complaint_hotspots")
+            cursor.executemany(INSERT_QUERY, rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# Pipeline stage: counts every chunk, writes the table once at the end..
+# resume=True adds the counts onto the existing table; only for runs that resumed from
+# a watermark (a first run sees every row again and must overwrite it).
+class HotspotAggregator:
+
+    def __init__(self, path=HOTSPOTS_PATH, resume=False, to_db=False):
+        self.path = path
+        self.resume = resume
+        self.to_db = to_db
+        self.counts = []
+
+    def load(self, df_nlp):
+        self.counts.append(aggregate(df_nlp))
+        if len(self.counts) > 1:
+            self.counts = [merge(*self.counts)]
+
+    def close(self):
+        counts = list(self.counts)
+        if self.resume and os.path.exists(self.path):
+            counts.append(load_hotspots(self.path))
+        if not counts:
+            return
+
+        hotspots = merge(*counts)
+        hotspots.to_csv(self.path, index=False)
+        print(f"Saved:  {self.path} ({len(hotspots)} rows)")
+
+        if self.to_db:
+            save_hotspots_db(hotspots)
+            print("Loaded into complaint_hotspots:", len(hotspots), "rows")
+
+
+if __name__ == "__main__":
+    from nlp_complaints import OUTPUT_PATH, load_output
+
+    parser = argparse.ArgumentParser(description="Grid hotspot counts from complaint NLP output")
+    parser.add_argument("--input", default=OUTPUT_PATH, help="complaint_nlp_output .csv or .parquet")
+    parser.add_argument("--output", default=HOTSPOTS_PATH)
+    parser.add_argument("--load-db", action="store_true", help="also replace the complaint_hotspots MySQL table")
+    args = parser.parse_args()
+
+    aggregator = HotspotAggregator(args.output, to_db=args.load_db)
+    aggregator.load(load_output(args.input))
+    aggregator.close()
+
+    print(top_cells(load_hotspots(args.output)))
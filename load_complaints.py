@@ -0,0 +1,187 @@
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+import pyarrow.dataset as ds
+import pymysql
+from dotenv import load_dotenv
+
+# the DB connection comes from the app's chatbot package (streamlit_app/, imported as chatbot.*)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app"))
+from chatbot.db_pool import connect, get_pool, get_router, is_sqlite
+from chatbot.rollups import compact, rollups_built
+
+load_dotenv()
+
+# Bulk loader: complaint NLP output → nlp_complaints table..
+# Rows are sent as multi-row INSERTs (pymysql rewrites executemany into one statement
+# per ~1MB) and committed every batch_size rows. Re-runs upsert on source_key (the 311
+# case_enquiry_id) instead of duplicating rows, so an updated case updates its row.
+# Once event_rollups exists, close() rebuilds its nlp_complaints rows, so the dashboard's
+# complaint KPIs and city chart include the load.
+
+DEFAULT_OUTPUT_PATH = "complaint_nlp_output.csv"
+DEFAULT_BATCH_SIZE = 5_000
+
+# the 311 file is Boston's..
+CITY = "Boston"
+
+UPSERT_QUERY = """
+    INSERT INTO nlp_complaints
+    (source_key, city, category, department, complaint_text, sentiment, priority, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        city = VALUES(city),
+        category = VALUES(category),
+        department = VALUES(department),
+        complaint_text = VALUES(complaint_text),
+        sentiment = VALUES(sentiment),
+        priority = VALUES(priority),
+        created_at = VALUES(created_at)
+"""
+
+SQLITE_UPSERT_QUERY = """
+    INSERT INTO nlp_complaints
+    (source_key, city, category, department, complaint_text, sentiment, priority, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (source_key) DO UPDATE SET
+        city = excluded.city,
+        category = excluded.category,
+        department = excluded.department,
+        complaint_text = excluded.complaint_text,
+        sentiment = excluded.sentiment,
+        priority = excluded.priority,
+        created_at = excluded.created_at
+"""
+
+# the 311 case id: stable for the life of a request, while title / closure reason change
+SOURCE_KEY_COLUMN = "case_enquiry_id"
+
+# source_key (migration 1) and a nullable created_at (migration 3) come from
+# streamlit_app/chatbot/schema.py
+REQUIRED_SCHEMA_VERSION = 3
+NO_SUCH_TABLE = 1146
+
+
+# the app's connect() (DB_HOST / DB_PORT / DB_BACKEND, UTC session) on the primary,
+# or on the city's shard with DB_SHARDS
+def get_connection(city=None):
+    return connect(get_router().write_host(city))
+
+
+# (the SQLite backend creates its tables at the current schema on connect)
+def check_schema(conn):
+    if is_sqlite(conn):
+        return
+
+    with conn.cursor() as cursor:
+        try:
+            cursor.execute("SELECT MAX(version) FROM schema_migrations")
+            version = cursor.fetchone()[0] or 0
+        except pymysql.err.ProgrammingError as e:
+            if e.args[0] != NO_SUCH_TABLE:
+                raise
+            version = 0
+
+    if version < REQUIRED_SCHEMA_VERSION:
+        raise RuntimeError(
+            f"nlp_complaints schema is at version {version}, the loader needs {REQUIRED_SCHEMA_VERSION}: "
+            "run `python -m chatbot.schema migrate` from streamlit_app/"
+        )
+
+
+# column values for the INSERT, with missing values as NULL..
+def column_values(series):
+    return series.astype(object).where(series.notna(), None)
+
+
+# unparseable open_dt stays NULL rather than being stamped with the load time..
+def complaint_rows(df_nlp, city=CITY):
+    created_at = column_values(pd.to_datetime(df_nlp["open_dt"], errors="coerce"))
+
+    return list(zip(
+        df_nlp[SOURCE_KEY_COLUMN].astype(str),
+        [city] * len(df_nlp),
+        column_values(df_nlp["case_title"]),
+        column_values(df_nlp["department"]),
+        column_values(df_nlp["complaint_text"]),
+        column_values(df_nlp["sentiment"]),
+        column_values(df_nlp["priority"]),
+        [None if ts is None else ts.to_pydatetime() for ts in created_at]
+    ))
+
+
+class ComplaintLoader:
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, city=CITY):
+        self.batch_size = batch_size
+        self.city = city
+        self.rows = 0
+        self.skipped = 0
+        self.seconds = 0.0
+        self.host = get_router().write_host(city)
+        self.conn = connect(self.host)
+        check_schema(self.conn)
+
+    # one transaction per batch_size rows..
+    def load(self, df_nlp):
+        if SOURCE_KEY_COLUMN not in df_nlp.columns:
+            raise ValueError(f"no {SOURCE_KEY_COLUMN} column: re-run nlp_complaints.py without --incremental to rewrite the output")
+
+        start = time.perf_counter()
+        keyed = df_nlp[df_nlp[SOURCE_KEY_COLUMN].notna()]
+        self.skipped += len(df_nlp) - len(keyed)
+        rows = complaint_rows(keyed, self.city)
+
+        query = SQLITE_UPSERT_QUERY if is_sqlite(self.conn) else UPSERT_QUERY
+        cursor = self.conn.cursor()
+        try:
+            for i in range(0, len(rows), self.batch_size):
+                self.conn.begin()
+                try:
+                    cursor.executemany(query, rows[i:i + self.batch_size])
+                    self.conn.commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+        finally:
+            cursor.close()
+
+        self.rows += len(rows)
+        self.seconds += time.perf_counter() - start
+
+    def close(self):
+        self.conn.close()
+        rate = self.rows / self.seconds if self.seconds else 0.0
+        print(f"Loaded into nlp_complaints: {self.rows} rows in {self.seconds:.1f}s ({rate:,.0f} rows/s)")
+        if self.skipped:
+            print(f"Skipped {self.skipped} rows without a {SOURCE_KEY_COLUMN}")
+
+        pool = get_pool(self.host)
+        if self.rows and rollups_built(pool):
+            compact(["nlp_complaints"], pool)
+
+
+# Read an existing pipeline output (CSV or Parquet file / dataset directory) in chunks..
+def read_output_chunks(path, chunk_size=DEFAULT_BATCH_SIZE * 10):
+    if path.endswith(".parquet"):
+        for batch in ds.dataset(path, format="parquet").to_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, dtype=str, chunksize=chunk_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk load complaint NLP output into the nlp_complaints table")
+    parser.add_argument("--input", default=DEFAULT_OUTPUT_PATH, help="complaint_nlp_output .csv or .parquet")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("--city", default=CITY)
+    args = parser.parse_args()
+
+    loader = ComplaintLoader(args.batch_size, args.city)
+    try:
+        for chunk in read_output_chunks(args.input):
+            loader.load(chunk)
+    finally:
+        loader.close()
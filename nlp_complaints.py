@@ -1,18 +1,40 @@
+import argparse
+import hashlib
+import json
+import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import re
-from textblob import TextBlob
+import shutil
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+
+from complaint_hotspots import HotspotAggregator
+from load_complaints import ComplaintLoader
+from streamlit_app.chatbot.sentiment import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    priority_label,
+    score_text,
+    score_values,
+    sentiment_label
+)
 
 # load data..
 data_path = "F:/Rani/Urbanbot intelligence/data/og_311_ServiceRequest_2021.csv"
 
-df = pd.read_csv(data_path, low_memory = False)
-
-print("Data loaded: ", df.shape)
-
-print(df.columns)
+OUTPUT_PATH = "complaint_nlp_output.csv"
+CLEANED_PATH = "complaint_nlp_cleaned.csv"
+PARQUET_PATH = "complaint_nlp_output.parquet"
+WATERMARK_PATH = "complaint_nlp_watermark.json"
 
-# select required columns..
-df_nlp = df[[
+# required columns (and their dtypes for the streaming reader)..
+NLP_COLUMNS = [
     "case_title",
     "subject",
     "closure_reason",
@@ -20,23 +42,65 @@ df_nlp = df[[
     "department",
     "latitude",
     "longitude",
-    "case_status"
-]]
-
-# Create one text column..
-df_nlp["complaint_text"] = (
-    df_nlp["case_title"].astype(str) + " " +
-    df_nlp["subject"].astype(str) + " " +
-    df_nlp["closure_reason"].astype(str)
-)
+    "case_status",
+    "case_enquiry_id"
+]
+
+NLP_DTYPES = {
+    "case_title": str,
+    "subject": str,
+    "closure_reason": str,
+    "open_dt": str,
+    "department": str,
+    "latitude": "float64",
+    "longitude": "float64",
+    "case_status": str,
+    "case_enquiry_id": str
+}
+
+# row key of a service request (watermark ties, and the nlp_complaints upsert key)..
+KEY_COLUMN = "case_enquiry_id"
+
+# columns kept in the cleaned dataset..
+CLEANED_COLUMNS = [
+    "clean_text",
+    "sentiment",
+    "priority",
+    "open_dt",
+    "department",
+    "latitude",
+    "longitude"
+]
 
-print("Selected columns: ", df_nlp.columns)
-print("Row Before cleaning:", df_nlp.shape)            # (273951, 9)
+# columnar output: low-cardinality labels as dictionaries, open_dt as a real timestamp..
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
 
+OUTPUT_SCHEMA = pa.schema([
+    ("case_title", pa.string()),
+    ("subject", pa.string()),
+    ("closure_reason", pa.string()),
+    ("open_dt", pa.timestamp("us")),
+    ("department", CATEGORY),
+    ("latitude", pa.float64()),
+    ("longitude", pa.float64()),
+    ("case_status", CATEGORY),
+    ("case_enquiry_id", pa.string()),
+    ("complaint_text", pa.string()),
+    ("clean_text", pa.string()),
+    ("sentiment", CATEGORY),
+    ("priority", CATEGORY)
+])
 
-# Remove empty complaints..
-df_nlp = df_nlp.dropna(subset=["complaint_text"])
-print("Rows after cleaning:", df_nlp.shape)            # (273945, 9)
+OUTPUT_FORMATS = ["csv", "parquet"]
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# below this many rows the pool start-up/pickling costs more than it saves..
+PARALLEL_MIN_ROWS = 10_000
+SHARDS_PER_WORKER = 4
+
+# in-memory memo size without --memo (least recently used texts are dropped)..
+MEMO_MAX_ENTRIES = 200_000
 
 
 # Text cleaning function..
@@ -48,55 +112,482 @@ def clean_text(text):
     text = re.sub(r"\d+", "", text)           # remove numbers
     return text
 
-df_nlp["clean_text"] = df_nlp["complaint_text"].apply(clean_text)
 
+# Precompiled patterns for the vectorized cleaner..
+# "[^a-z]+" -> " " is the same as symbols -> " " followed by "\s+" -> " ",
+# and no digits survive that step, so the "\d+" pass is a no-op.
+URL_RE = re.compile(r"http\S+")
+NON_ALPHA_RE = re.compile(r"[^a-z]+")
 
-# Sentiment analysis function..
-def get_sentiment(text):
-    polarity = TextBlob(text).sentiment.polarity
-    if polarity > 0:
-        return "positive"
-    elif polarity < 0:
-        return "negative"
-    else:
-        return "neutral"
-    
-df_nlp["sentiment"] = df_nlp["clean_text"].apply(get_sentiment)
+
+# Vectorized text cleaning (same output as clean_text, one pass per row)..
+def clean_text_series(texts):
+    url_sub = URL_RE.sub
+    non_alpha_sub = NON_ALPHA_RE.sub
+    cleaned = [
+        non_alpha_sub(" ", url_sub("", text)).strip()
+        for text in texts.astype(str).str.lower()
+    ]
+    return pd.Series(cleaned, index=texts.index, dtype=object)
+
+
+# Sentiment analysis function (shared scorer, see chatbot/sentiment.py)..
+def get_sentiment(text, backend=DEFAULT_BACKEND):
+    return score_text(text, backend)[0]
+
+
+# Sentiment memo: score per unique clean_text (sha1 of backend + text → score)..
+# With a path it is loaded at start and new entries are appended, so re-runs
+# only score strings that have never been seen. Without a path it is an LRU of
+# max_entries scores, so streaming runs keep bounded memory.
+class SentimentMemo:
+
+    def __init__(self, path=None, backend=DEFAULT_BACKEND, max_entries=MEMO_MAX_ENTRIES):
+        self.path = path
+        self.backend = backend
+        self.max_entries = max_entries
+        self.polarity = OrderedDict()
+        self.new = {}
+        self.rows = 0
+        self.lookups = 0
+        self.hits = 0
+
+        if path and os.path.exists(path):
+            memo = pd.read_csv(path, dtype={"hash": str, "polarity": "float64"})
+            self.polarity = OrderedDict(zip(memo["hash"], memo["polarity"]))
+
+    def key(self, text):
+        return hashlib.sha1(f"{self.backend}:{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        polarity = self.polarity.get(key)
+        if polarity is not None and not self.path:
+            self.polarity.move_to_end(key)
+        return polarity
+
+    def add(self, key, polarity):
+        self.polarity[key] = polarity
+        if self.path:
+            self.new[key] = polarity
+        elif len(self.polarity) > self.max_entries:
+            self.polarity.popitem(last=False)
+
+    # append entries scored since the last save..
+    def save(self):
+        if not self.path or not self.new:
+            return
+
+        pd.DataFrame({
+            "hash": list(self.new.keys()),
+            "polarity": list(self.new.values())
+        }).to_csv(self.path, mode="a", header=not os.path.exists(self.path), index=False)
+        self.new = {}
+
+    def report(self):
+        scored = self.lookups - self.hits
+        row_hit_rate = 1 - scored / self.rows if self.rows else 0.0
+        memo_hit_rate = self.hits / self.lookups if self.lookups else 0.0
+        print(f"Sentiment rows: {self.rows}, unique texts: {self.lookups}, scored: {scored}")
+        print(f"Sentiment hit rate: {row_hit_rate:.1%} of rows, memo: {memo_hit_rate:.1%} of unique texts")
+
+
+# Process pool for sentiment scoring (workers <= 1 means serial)..
+def sentiment_pool(workers):
+    if workers <= 1:
+        return nullcontext()
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+# Scores for a list of texts, sharded across the pool, order preserved..
+def score_polarity(values, pool=None, workers=1, backend=DEFAULT_BACKEND):
+    if pool is None or workers <= 1 or len(values) < PARALLEL_MIN_ROWS:
+        return score_values(values, backend)
+
+    shard_size = -(-len(values) // (workers * SHARDS_PER_WORKER))
+    shards = [values[i:i + shard_size] for i in range(0, len(values), shard_size)]
+    scored = pool.map(partial(score_values, backend=backend), shards)
+    return [polarity for shard in scored for polarity in shard]
+
+
+# Sentiment for a whole column: each unique text is scored once, memo hits are skipped..
+def sentiment_series(texts, pool=None, workers=1, memo=None):
+    if memo is None:
+        memo = SentimentMemo()
+
+    unique = list(dict.fromkeys(texts.tolist()))
+    keys = [memo.key(text) for text in unique]
+    scores = {key: memo.get(key) for key in keys}
+    missing = [(key, text) for key, text in zip(keys, unique) if scores[key] is None]
+
+    polarities = score_polarity([text for _, text in missing], pool, workers, memo.backend)
+    for (key, _), polarity in zip(missing, polarities):
+        scores[key] = polarity
+        memo.add(key, polarity)
+
+    memo.rows += len(texts)
+    memo.lookups += len(unique)
+    memo.hits += len(unique) - len(missing)
+
+    labels = {text: sentiment_label(scores[key], memo.backend) for key, text in zip(keys, unique)}
+    return texts.map(labels).astype(object)
 
 
 # check priority scoring function..
 def urgency_score(sentiment):
-    if sentiment == "negative":
-        return "high"
-    elif sentiment == "neutral":
-        return "medium"
-    else:
-        return "low"
-    
-df_nlp["priority"] = df_nlp["sentiment"].apply(urgency_score)
+    return priority_label(sentiment)
 
-# verify result (Confidence check)..
-print(df_nlp[["complaint_text", "clean_text", "sentiment", "priority"]].head(10))
 
+# clean → sentiment → priority on one frame (whole file or one chunk)..
+def process_frame(df_nlp, pool=None, workers=1, memo=None):
+    df_nlp = df_nlp.copy()
 
-# Save NLP output..
-df_nlp.to_csv("complaint_nlp_output.csv", index = False)
-print("Saved: complaint_nlp_output.csv")
+    # Create one text column..
+    df_nlp["complaint_text"] = (
+        df_nlp["case_title"].astype(str) + " " +
+        df_nlp["subject"].astype(str) + " " +
+        df_nlp["closure_reason"].astype(str)
+    )
 
+    # Remove empty complaints..
+    df_nlp = df_nlp.dropna(subset=["complaint_text"])
+
+    df_nlp["clean_text"] = clean_text_series(df_nlp["complaint_text"])
+    df_nlp["sentiment"] = sentiment_series(df_nlp["clean_text"], pool, workers, memo)
+    df_nlp["priority"] = df_nlp["sentiment"].apply(urgency_score)
+    return df_nlp
+
+
+# Two-CSV output (the original format)..
+# Chunks go to "." staging files next to the outputs; close() appends them (or, for a
+# new file, renames them into place), so an interrupted run adds nothing to the CSVs.
+class CsvOutput:
+
+    def __init__(self, append=False, output_path=OUTPUT_PATH, cleaned_path=CLEANED_PATH):
+        self.append = append
+        self.paths = [output_path, cleaned_path]
+        self.staged = [os.path.join(os.path.dirname(p), "." + os.path.basename(p) + ".tmp") for p in self.paths]
+        self.headers = [not (append and os.path.exists(p)) for p in self.paths]
+        self.started = False
+
+    def write(self, df_nlp):
+        if not self.started:
+            # rows are appended without a header, so the columns have to line up with the file's
+            if not self.headers[0]:
+                existing = list(pd.read_csv(self.paths[0], nrows=0).columns)
+                if existing != list(df_nlp.columns):
+                    raise ValueError(f"{self.paths[0]} has columns {existing}; re-run without --incremental to rewrite it")
+
+        mode = "a" if self.started else "w"
+        for frame, staged, header in zip([df_nlp, df_nlp[CLEANED_COLUMNS]], self.staged, self.headers):
+            frame.to_csv(staged, index=False, mode=mode, header=header and not self.started)
+        self.started = True
+
+    def close(self):
+        if not self.started:
+            return
+        for path, staged, header in zip(self.paths, self.staged, self.headers):
+            if header:
+                os.replace(staged, path)
+                continue
+            with open(staged, "rb") as src, open(path, "ab") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(staged)
 
-# cleaned dataset with created & selected columns..
-df_nlp[[
-    "clean_text",
-    "sentiment",
-    "priority",
-    "open_dt",
-    "department",
-    "latitude",
-    "longitude"
-]].to_csv("complaint_nlp_cleaned.csv", index=False)
 
-print("Saved: ", "complaint_nlp_cleaned.csv")
+# Parquet dataset directory with every output column: one part file per run,
+# written one row group per chunk. append=True just adds a new part, so an
+# incremental run costs the size of the new rows, not the whole history; a full
+# run replaces the old parts. The part is written under a "." name (ignored by
+# readers) and renamed on close(), so an interrupted run leaves nothing behind.
+class ParquetOutput:
 
-print("Processing completed.")
+    def __init__(self, append=False, path=PARQUET_PATH):
+        self.path = path
+        self.paths = [path]
+        self.append = append
+        self.part = f"part-{int(time.time() * 1000)}.parquet"
+        self.tmp_path = os.path.join(path, "." + self.part + ".tmp")
+        self.writer = None
+
+        # single-file output from before the dataset layout becomes the first part
+        if os.path.isfile(path):
+            os.replace(path, path + ".old")
+            os.makedirs(path)
+            os.replace(path + ".old", os.path.join(path, "part-0.parquet"))
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, df_nlp):
+        df_out = df_nlp.copy()
+        df_out["open_dt"] = pd.to_datetime(df_out["open_dt"], errors="coerce")
+        table = pa.Table.from_pandas(df_out, schema=OUTPUT_SCHEMA, preserve_index=False)
+
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.tmp_path, OUTPUT_SCHEMA, compression="zstd")
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.writer.close()
+
+        if not self.append:
+            for name in os.listdir(self.path):
+                if name.endswith(".parquet"):
+                    os.remove(os.path.join(self.path, name))
+        os.replace(self.tmp_path, os.path.join(self.path, self.part))
+
+
+def open_output(fmt="csv", append=False, directory=""):
+    if fmt == "parquet":
+        return ParquetOutput(append, os.path.join(directory, PARQUET_PATH))
+    return CsvOutput(append, os.path.join(directory, OUTPUT_PATH), os.path.join(directory, CLEANED_PATH))
+
+
+def output_exists(fmt="csv"):
+    return os.path.exists(PARQUET_PATH if fmt == "parquet" else OUTPUT_PATH)
+
+
+# Load the pipeline output back with proper dtypes (either format)..
+def load_output(path=OUTPUT_PATH):
+    if path.endswith(".parquet"):
+        return ds.dataset(path, schema=OUTPUT_SCHEMA, format="parquet").to_table().to_pandas()
+
+    dtypes = {**NLP_DTYPES, "complaint_text": str, "clean_text": str}
+    del dtypes["open_dt"]
+
+    df = pd.read_csv(path, dtype=dtypes, parse_dates=["open_dt"])
+    for column in ["department", "case_status", "sentiment", "priority"]:
+        df[column] = df[column].astype("category")
+    return df
+
+
+# Full load: whole file in memory..
+def run_full(path, workers=1, memo=None, fmt="csv", sinks=()):
+    # case ids are all digits, but they are keys (strings in the outputs and the DB)..
+    df = pd.read_csv(path, low_memory = False, dtype={KEY_COLUMN: str})
+
+    print("Data loaded: ", df.shape)
+
+    print(df.columns)
+
+    # select required columns..
+    df_nlp = df[NLP_COLUMNS]
+    del df
+
+    print("Selected columns: ", df_nlp.columns)
+    print("Row Before cleaning:", df_nlp.shape)            # (273951, 8)
+
+    with sentiment_pool(workers) as pool:
+        df_nlp = process_frame(df_nlp, pool, workers, memo)
+    print("Rows after cleaning:", df_nlp.shape)            # (273945, 12)
+
+    # verify result (Confidence check)..
+    print(df_nlp[["complaint_text", "clean_text", "sentiment", "priority"]].head(10))
+
+    output = open_output(fmt)
+    output.write(df_nlp)
+    output.close()
+    for saved in output.paths:
+        print("Saved: ", saved)
+
+    for sink in sinks:
+        sink.load(df_nlp)
+
+
+# Streaming load: only the needed columns, fixed-size chunks, appended to the outputs..
+# Peak memory is bounded by chunk_size, not by the file size.
+def run_streaming(path, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, memo=None, fmt="csv", sinks=()):
+    reader = pd.read_csv(
+        path,
+        usecols=NLP_COLUMNS,
+        dtype=NLP_DTYPES,
+        chunksize=chunk_size
+    )
+
+    output = open_output(fmt)
+    total = 0
+    with sentiment_pool(workers) as pool:
+        for i, chunk in enumerate(reader):
+            df_nlp = process_frame(chunk[NLP_COLUMNS], pool, workers, memo)
+            output.write(df_nlp)
+            if memo is not None:
+                memo.save()
+            for sink in sinks:
+                sink.load(df_nlp)
+            total += len(df_nlp)
+            print(f"Chunk {i + 1}: {len(df_nlp)} rows (total {total})")
+    output.close()
+
+    for saved in output.paths:
+        print("Saved: ", saved)
+    return total
+
+
+# Watermark: latest open_dt processed + the case ids at exactly that time..
+# Requests whose open_dt doesn't parse can't be placed against it, so their case ids
+# are kept in "undated" and they are picked up (once) by case id alone.
+def load_watermark(path=WATERMARK_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermark(watermark, path=WATERMARK_PATH):
+    with open(path, "w") as f:
+        json.dump(watermark, f, indent=2)
+
+
+# keep only service requests newer than the watermark (ties on open_dt are settled by case id)..
+def new_rows(chunk, watermark):
+    if watermark is None:
+        return chunk
+
+    opened = pd.to_datetime(chunk["open_dt"], errors="coerce")
+    undated = opened.isna() & ~chunk[KEY_COLUMN].isin(set(watermark.get("undated", [])))
+    if watermark["open_dt"] is None:
+        return chunk[opened.notna() | undated]
+
+    last = pd.Timestamp(watermark["open_dt"])
+    seen = chunk[KEY_COLUMN].isin(set(watermark["keys"]))
+    return chunk[(opened > last) | ((opened == last) & ~seen) | undated]
+
+
+def advance_watermark(watermark, chunk):
+    opened = pd.to_datetime(chunk["open_dt"], errors="coerce")
+    watermark = dict(watermark or {"open_dt": None, "keys": []})
+
+    undated = chunk.loc[opened.isna(), KEY_COLUMN].dropna()
+    if not undated.empty:
+        watermark["undated"] = sorted(set(watermark.get("undated", [])) | set(undated))
+
+    if opened.isna().all():
+        return watermark
+
+    latest = opened.max()
+    keys = chunk.loc[opened == latest, KEY_COLUMN].tolist()
+
+    if watermark["open_dt"] is not None:
+        last = pd.Timestamp(watermark["open_dt"])
+        if last > latest:
+            return watermark
+        if last == latest:
+            keys = sorted(set(watermark["keys"]) | set(keys))
+
+    watermark.update(open_dt=latest.isoformat(), keys=keys)
+    return watermark
+
+
+# Incremental load: only service requests after the watermark, appended to the existing outputs..
+# The first run (no watermark file) processes everything and writes the outputs from scratch.
+# Both outputs only take the new rows on close() and the watermark is written last,
+# so an interrupted run is simply re-done by the next one.
+def run_incremental(path, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, memo=None, fmt="csv", sinks=(),
+                    watermark_path=WATERMARK_PATH):
+    watermark = load_watermark(watermark_path)
+    output = open_output(fmt, append=watermark is not None and output_exists(fmt))
+
+    reader = pd.read_csv(
+        path,
+        usecols=NLP_COLUMNS,
+        dtype=NLP_DTYPES,
+        chunksize=chunk_size
+    )
+
+    latest = watermark
+    total = 0
+    undated = 0
+    with sentiment_pool(workers) as pool:
+        for chunk in reader:
+            chunk = new_rows(chunk, watermark)
+            if chunk.empty:
+                continue
+
+            df_nlp = process_frame(chunk[NLP_COLUMNS], pool, workers, memo)
+            output.write(df_nlp)
+            if memo is not None:
+                memo.save()
+            for sink in sinks:
+                sink.load(df_nlp)
+
+            latest = advance_watermark(latest, chunk)
+            total += len(df_nlp)
+            undated += pd.to_datetime(chunk["open_dt"], errors="coerce").isna().sum()
+    output.close()
+
+    if latest is not None:
+        save_watermark(latest, watermark_path)
+
+    print(f"New rows: {total} ({undated} with unparseable open_dt), watermark: {latest['open_dt'] if latest else None}")
+    return total
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="311 complaint sentiment & priority batch job")
+    parser.add_argument("--input", default=data_path, help="311 service request CSV")
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=0,
+        help=f"stream the CSV in chunks of this many rows (e.g. {DEFAULT_CHUNK_SIZE}); 0 loads the whole file"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="processes for sentiment scoring; 1 is serial, 0 uses every CPU core"
+    )
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND, help="sentiment scorer")
+    parser.add_argument("--memo", help="on-disk sentiment memo CSV (hash → polarity) kept between runs")
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help=f"csv writes the two CSVs, parquet writes part files under {PARQUET_PATH}/ (categoricals + timestamps)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"only process requests newer than the open_dt watermark in {WATERMARK_PATH} and append them"
+    )
+    parser.add_argument(
+        "--load-db",
+        action="store_true",
+        help="also upsert the results into the nlp_complaints MySQL table"
+    )
+    parser.add_argument("--db-batch-size", type=int, default=5_000, help="rows per transaction for --load-db")
+    parser.add_argument(
+        "--hotspots",
+        action="store_true",
+        help="also build grid hotspot counts (complaint_hotspots.csv, and the MySQL table with --load-db)"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    workers = args.workers or os.cpu_count()
+    memo = SentimentMemo(args.memo, args.backend)
+
+    # extra per-chunk stages after the outputs are written..
+    sinks = []
+    if args.load_db:
+        sinks.append(ComplaintLoader(args.db_batch_size))
+    if args.hotspots:
+        # before the run: it writes the watermark the next run resumes from
+        resume = args.incremental and load_watermark() is not None
+        sinks.append(HotspotAggregator(resume=resume, to_db=args.load_db))
+
+    if args.incremental:
+        run_incremental(args.input, args.chunksize or DEFAULT_CHUNK_SIZE, workers, memo, args.format, sinks)
+    elif args.chunksize > 0:
+        run_streaming(args.input, args.chunksize, workers, memo, args.format, sinks)
+    else:
+        run_full(args.input, workers, memo, args.format, sinks)
 
+    memo.save()
+    memo.report()
+    for sink in sinks:
+        sink.close()
 
+    print("Processing completed.")
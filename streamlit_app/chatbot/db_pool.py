@@ -0,0 +1,219 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# 🔌 Shared MySQL connection pool (or SQLite, with DB_BACKEND=sqlite)
+# One pool per process. It lives at module level, so Streamlit reruns (which re-execute
+# the page scripts, not imported modules) keep reusing the same open connections
+# instead of paying a TCP + auth handshake to RDS for every query and insert.
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))       # seconds before a connection is replaced
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))       # seconds to wait for a free connection
+PING_AFTER_IDLE = 30                                           # idle seconds before a health check
+
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")                  # mysql | sqlite (see chatbot/sqlite_backend.py)
+
+# Routing (see Router below). A "host" is a MySQL host, or a file path with DB_BACKEND=sqlite.
+DB_READ_HOSTS = [h.strip() for h in os.getenv("DB_READ_HOSTS", "").split(",") if h.strip()]
+DB_SHARDS = dict(                                              # "Chennai=host-a,Delhi=host-b"
+    pair.strip().split("=", 1) for pair in os.getenv("DB_SHARDS", "").split(",") if "=" in pair
+)
+
+# city-keyed tables: rows live on their city's shard (rollups travel with their events)
+SHARDED_TABLES = {
+    "accident_events", "road_damage_events", "crowd_events",
+    "traffic_events", "air_quality_events", "nlp_complaints", "event_rollups"
+}
+
+
+def primary_host():
+    if DB_BACKEND == "sqlite":
+        from chatbot import sqlite_backend
+        return sqlite_backend.SQLITE_PATH
+    return os.getenv("DB_HOST")
+
+
+def connect(host=None):
+    if DB_BACKEND == "sqlite":
+        from chatbot import sqlite_backend
+        return sqlite_backend.connect(host)
+
+    return pymysql.connect(
+        host=host or os.getenv("DB_HOST"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        database=os.getenv("DB_NAME"),
+        port=int(os.getenv("DB_PORT", "3306")),
+        connect_timeout=10,
+        autocommit=True,
+        init_command="SET time_zone = '+00:00'"       # NOW() / CURRENT_TIMESTAMP in UTC, like the event writer
+    )
+
+
+def is_sqlite(conn_or_cursor):
+    return isinstance(conn_or_cursor, (sqlite3.Connection, sqlite3.Cursor))
+
+
+# cursor that streams rows instead of buffering the whole result
+# (MySQL: server-side SSCursor; sqlite cursors already step through the result)
+def streaming_cursor(conn):
+    if is_sqlite(conn):
+        return conn.cursor()
+    return conn.cursor(pymysql.cursors.SSCursor)
+
+
+class ConnectionPool:
+
+    def __init__(self, size=POOL_SIZE, recycle=POOL_RECYCLE, timeout=POOL_TIMEOUT, connect=connect):
+        self.size = size
+        self.recycle = recycle
+        self.timeout = timeout
+        self._connect = connect
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.stats = {"created": 0, "reused": 0, "recycled": 0, "failed_checks": 0, "discarded": 0}
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # an idle connection that is young enough and answers a ping, else a new one
+    def _checkout(self):
+        while True:
+            try:
+                conn, created, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+                self.stats["created"] += 1
+                return conn, time.time()
+
+            now = time.time()
+            if now - created > self.recycle:
+                self.stats["recycled"] += 1
+                self._close(conn)
+                continue
+
+            if now - last_used > PING_AFTER_IDLE:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    self.stats["failed_checks"] += 1
+                    self._close(conn)
+                    continue
+
+            self.stats["reused"] += 1
+            return conn, created
+
+    # with pool.connection() as conn: ...
+    # A connection that raised is closed, never handed out again.
+    @contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No free DB connection after {self.timeout}s (pool size {self.size})")
+
+        try:
+            conn, created = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        try:
+            yield conn
+        except Exception:
+            self.stats["discarded"] += 1
+            self._close(conn)
+            raise
+        else:
+            self._idle.put((conn, created, time.time()))
+        finally:
+            self._slots.release()
+
+    # a new connection to the same database, outside the pool (long reads that shouldn't hold a slot)
+    def unpooled(self):
+        return self._connect()
+
+    def close(self):
+        while True:
+            try:
+                conn, _, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn)
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+# one pool per host per process (default: the primary)
+def get_pool(host=None):
+    host = host or primary_host()
+    if host not in _pools:
+        with _pool_lock:
+            if host not in _pools:
+                _pools[host] = ConnectionPool(connect=partial(connect, host))
+    return _pools[host]
+
+
+# 🔀 Read/write routing
+# Writes go to the primary, or for a city in DB_SHARDS to that city's shard.
+# Reads of unsharded tables go round-robin to DB_READ_HOSTS (replicas of the primary),
+# or the primary if none are set. Reads of SHARDED_TABLES fan out to the primary and
+# every shard (SQLAgent merges the results); with no shards they behave like any read.
+# Replicas lag: a read right after a write may not see it yet.
+class Router:
+
+    def __init__(self, primary=None, read_hosts=None, shards=None):
+        self.primary = primary or primary_host()
+        self.read_hosts = list(DB_READ_HOSTS if read_hosts is None else read_hosts)
+        self.shards = dict(DB_SHARDS if shards is None else shards)
+        self._next_read = 0
+        self._lock = threading.Lock()
+
+    @property
+    def sharded(self):
+        return bool(self.shards)
+
+    def write_host(self, city=None):
+        return self.shards.get(city, self.primary)
+
+    def write_pool(self, city=None):
+        return get_pool(self.write_host(city))
+
+    def shard_hosts(self):
+        return list(dict.fromkeys([self.primary] + list(self.shards.values())))
+
+    def read_pools(self, tables=()):
+        if self.sharded and set(tables) & SHARDED_TABLES:
+            return [get_pool(host) for host in self.shard_hosts()]
+        if not self.read_hosts:
+            return [get_pool(self.primary)]
+        with self._lock:
+            host = self.read_hosts[self._next_read % len(self.read_hosts)]
+            self._next_read += 1
+        return [get_pool(host)]
+
+
+_router = None
+
+
+def get_router():
+    global _router
+    if _router is None:
+        with _pool_lock:
+            if _router is None:
+                _router = Router()
+    return _router
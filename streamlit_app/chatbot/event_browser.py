@@ -0,0 +1,232 @@
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from chatbot.db_pool import SHARDED_TABLES
+from chatbot.rollups import ROLLUP_SOURCES
+from chatbot.sql_agent import SQLAgent
+
+
+# 🔎 Event browser: keyset pagination + change polling over the six event tables
+# A cursor is (event_time, id) of a row already seen.
+#   page(...)          newest first; pass the returned cursor to get the next (older) page.
+#                      WHERE (time, id) < cursor walks the (time) / (city, time) indexes,
+#                      so page 1000 costs the same as page 1 (no OFFSET).
+#   changes_since(...) rows inserted after the cursor, oldest first.
+#                      Compares on id (insert order): with the write-behind writer a row's
+#                      event_time is when it was detected, which can be before rows already shown.
+# With city shards (DB_SHARDS) ids are only unique per shard, so the cursor is
+# {shard host: (event_time, id)} instead: each shard is read from its own position
+# and the rows are merged in (time, shard, id) order. Pass it back unchanged.
+# nlp_complaints.created_at is NULL for complaints whose open_dt didn't parse: those
+# rows come last (oldest), and a cursor on one is (None, id).
+# Results are never cached (ttl=0): they are already small and must be fresh.
+# A failed read is never reported as "no rows": page() / changes_since() raise, and
+# refresh_latest() keeps the panel's last rows and sets its error.
+
+PAGE_SIZE = 50
+MAX_CHANGES = 500
+
+# columns returned per table (id and the time column are always included)
+BROWSE_COLUMNS = {
+    "accident_events": ["city", "area", "severity"],
+    "road_damage_events": ["city", "area", "severity"],
+    "crowd_events": ["city", "severity", "crowd_count"],
+    "traffic_events": ["city", "congestion_level", "predicted_traffic"],
+    "air_quality_events": ["city", "aqi", "aqi_category"],
+    "nlp_complaints": ["city", "category", "priority"]
+}
+
+# tables whose time column may be NULL (NULLs sort last in ORDER BY ... DESC on MySQL and SQLite)
+NULLABLE_TIME = {"nlp_complaints"}
+
+
+def _time_param(value):
+    if pd.isna(value):
+        return None
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+# time range / city / severity (or congestion, AQI category, priority) filters
+def event_filters(table, start=None, end=None, city=None, label=None):
+    time_col, label_col = ROLLUP_SOURCES[table]
+    where, params = [], []
+    if start is not None:
+        where.append(f"{time_col} >= %s")
+        params.append(_time_param(start))
+    if end is not None:
+        where.append(f"{time_col} < %s")
+        params.append(_time_param(end))
+    if city is not None:
+        where.append("city = %s")
+        params.append(city)
+    if label is not None:
+        where.append(f"{label_col} = %s")
+        params.append(label)
+    return where, params
+
+
+def _select(table):
+    time_col = ROLLUP_SOURCES[table][0]
+    return f"SELECT id, {', '.join(BROWSE_COLUMNS[table])}, {time_col} FROM {table}"
+
+
+def page_query(table, start=None, end=None, city=None, label=None, cursor=None, limit=PAGE_SIZE):
+    time_col = ROLLUP_SOURCES[table][0]
+    where, params = event_filters(table, start, end, city, label)
+    if cursor is not None and cursor[0] is None:
+        where.append(f"{time_col} IS NULL AND id < %s")
+        params.append(cursor[1])
+    elif cursor is not None:
+        undated = f" OR {time_col} IS NULL" if table in NULLABLE_TIME else ""
+        where.append(f"({time_col} < %s OR ({time_col} = %s AND id < %s){undated})")
+        params += [_time_param(cursor[0]), _time_param(cursor[0]), cursor[1]]
+
+    query = _select(table)
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += f" ORDER BY {time_col} DESC, id DESC LIMIT {int(limit)}"
+    return query, params
+
+
+def changes_query(table, cursor=None, city=None, label=None, limit=MAX_CHANGES):
+    where, params = event_filters(table, city=city, label=label)
+    if cursor is not None:
+        where.append("id > %s")
+        params.append(cursor[1])
+
+    query = _select(table)
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += f" ORDER BY id LIMIT {int(limit)}"
+    return query, params
+
+
+def row_cursor(table, row):
+    return (_time_param(row[ROLLUP_SOURCES[table][0]]), int(row["id"]))
+
+
+# rows of every shard in one frame, with a shard column (its host), in (time, shard, id) order
+def _merge_by_shard(table, frames, ascending):
+    time_col = ROLLUP_SOURCES[table][0]
+    non_empty = [df.assign(shard=host) for host, df in frames.items() if not df.empty]
+    if not non_empty:
+        return next(iter(frames.values())).assign(shard=None)
+    merged = pd.concat(non_empty, ignore_index=True)
+    return merged.sort_values([time_col, "shard", "id"], ascending=ascending, ignore_index=True)
+
+
+class EventBrowser:
+
+    def __init__(self, agent=None):
+        self.agent = agent or SQLAgent()
+
+    # shard hosts to read separately when the table is split over city shards, else None
+    def _shards(self, table):
+        router = self.agent.router
+        if router is None or not router.sharded or table not in SHARDED_TABLES:
+            return None
+        return router.shard_hosts()
+
+    # (rows newest first, cursor for the next page or None at the end)
+    def page(self, table, start=None, end=None, city=None, label=None, cursor=None, limit=PAGE_SIZE):
+        hosts = self._shards(table)
+        if hosts is not None:
+            return self._page_shards(hosts, table, (start, end, city, label), cursor or {}, limit)
+
+        query, params = page_query(table, start, end, city, label, cursor, limit)
+        df = self.agent.fetch_dataframe(query, params, ttl=0, raise_errors=True)
+        if len(df) < limit:
+            return df, None
+        return df, row_cursor(table, df.iloc[-1])
+
+    # (new rows oldest first, cursor to poll with next time)
+    def changes_since(self, table, cursor, city=None, label=None, limit=MAX_CHANGES):
+        hosts = self._shards(table)
+        if hosts is not None:
+            return self._changes_shards(hosts, table, cursor or {}, city, label, limit)
+
+        query, params = changes_query(table, cursor, city, label, limit)
+        df = self.agent.fetch_dataframe(query, params, ttl=0, raise_errors=True)
+        if df.empty:
+            return df, cursor
+        return df, row_cursor(table, df.iloc[-1])
+
+    # Every shard pages from its own cursor; the pages are merged and cut to limit, and each
+    # shard's cursor moves to its last row that made the cut (its other rows come again next page).
+    def _page_shards(self, hosts, table, filters, cursor, limit):
+        frames = self.agent.read_shards({
+            host: page_query(table, *filters, cursor=cursor.get(host), limit=limit) for host in hosts
+        })
+        merged = _merge_by_shard(table, frames, ascending=False)
+        rows = merged.head(limit)
+
+        # the end: no shard has rows past the ones just returned
+        if len(merged) <= limit and all(len(df) < limit for df in frames.values()):
+            return rows.drop(columns="shard"), None
+
+        next_cursor = dict(cursor)
+        for host, shard_rows in rows.groupby("shard", sort=False):
+            next_cursor[host] = row_cursor(table, shard_rows.iloc[-1])
+        return rows.drop(columns="shard"), next_cursor
+
+    def _changes_shards(self, hosts, table, cursor, city, label, limit):
+        frames = self.agent.read_shards({
+            host: changes_query(table, cursor.get(host), city, label, limit) for host in hosts
+        })
+        next_cursor = dict(cursor)
+        for host, df in frames.items():
+            if not df.empty:
+                next_cursor[host] = row_cursor(table, df.iloc[-1])
+        return _merge_by_shard(table, frames, ascending=True).drop(columns="shard"), next_cursor
+
+    # Keep a "latest n" panel per table up to date: {name: (table, rows, cursor, error)} → same dict.
+    # The first call loads each panel; after that only new rows are fetched, all tables in parallel.
+    # A panel whose read failed keeps its rows and cursor, with error set to the message.
+    # With city shards each panel is reloaded instead (page() merges the shards' newest n).
+    def refresh_latest(self, panels, n=5):
+        if any(self._shards(table) is not None for table, *_ in panels.values()):
+            return self._reload_latest(panels, n)
+
+        queries = {}
+        for name, (table, rows, cursor, _) in panels.items():
+            if rows is None:
+                queries[name] = page_query(table, limit=n)
+            else:
+                queries[name] = changes_query(table, cursor, limit=MAX_CHANGES)
+
+        results = self.agent.fetch_many(queries, ttl=0, return_errors=True)
+
+        refreshed = {}
+        for name, (table, rows, cursor, _) in panels.items():
+            new = results[name]
+            if isinstance(new, Exception):
+                refreshed[name] = (table, rows, cursor, f"{type(new).__name__}: {new}")
+            elif rows is None:
+                # nothing yet: load again next time
+                if new.empty:
+                    refreshed[name] = (table, None, None, None)
+                else:
+                    # newest row by id is the polling cursor
+                    refreshed[name] = (table, new, row_cursor(table, new.loc[new["id"].idxmax()]), None)
+            elif new.empty:
+                refreshed[name] = (table, rows, cursor, None)
+            else:
+                time_col = ROLLUP_SOURCES[table][0]
+                merged = pd.concat([new, rows], ignore_index=True)
+                merged = merged.sort_values([time_col, "id"], ascending=False, ignore_index=True).head(n)
+                refreshed[name] = (table, merged, row_cursor(table, new.iloc[-1]), None)
+        return refreshed
+
+    def _reload_latest(self, panels, n):
+        with ThreadPoolExecutor(max_workers=len(panels)) as executor:
+            futures = {name: executor.submit(self.page, table, limit=n) for name, (table, *_) in panels.items()}
+
+        refreshed = {}
+        for name, (table, rows, cursor, _) in panels.items():
+            error = futures[name].exception()
+            if error is not None:
+                refreshed[name] = (table, rows, cursor, f"{type(error).__name__}: {error}")
+            else:
+                refreshed[name] = (table, futures[name].result()[0], None, None)
+        return refreshed
@@ -0,0 +1,325 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import pymysql
+from dotenv import load_dotenv
+from chatbot.db_pool import get_pool, get_router
+from chatbot.query_cache import invalidate
+from chatbot.rollups import ROLLUP_SOURCES, record_events
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+# ✍ Write-behind event writer for the detection pages
+# write() only puts the row on a bounded in-memory queue and returns; a background
+# thread drains it every FLUSH_INTERVAL seconds (or BATCH_SIZE rows) and inserts each
+# table's rows with one executemany, all in one transaction, plus their rollup counts.
+# If the DB can't be reached the batch is appended to SPILL_PATH (JSON lines) and
+# replayed, in its own transactions, with the next flush (or every RETRY_INTERVAL when
+# idle), so detections aren't lost while RDS is down. A batch the DB rejects (bad value,
+# constraint) is retried row by row; the rows it still rejects go to DEAD_LETTER_PATH
+# and are never retried.
+# Each row gets its event time (UTC, like the app's DB sessions, see db_pool.connect)
+# when it is queued, not when it is flushed.
+
+WRITE_BEHIND = os.getenv("EVENT_WRITE_BEHIND", "1") == "1"        # 0 = insert inside write()
+QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "1000"))
+BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "200"))
+FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", "1"))     # seconds
+SPILL_PATH = os.getenv("EVENT_SPILL_PATH", "event_spill.jsonl")    # empty = no spill file
+DEAD_LETTER_PATH = os.getenv("EVENT_DEAD_LETTER_PATH", "event_dead_letter.jsonl")
+PUT_TIMEOUT = 1                                                    # seconds to wait on a full queue
+RETRY_INTERVAL = 30                                                # seconds between spill replays while idle
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# MySQL errors worth retrying: client errors (2000+: can't connect, server gone away,
+# lost connection), too many connections, lock wait timeout, deadlock. pymysql raises
+# most server errors (unknown column, ...) as OperationalError too, so it's the code that counts.
+RETRY_MYSQL_ERRORS = {1040, 1205, 1213}
+RETRY_SQLITE_MESSAGES = ("database is locked", "unable to open database", "disk i/o error")
+
+
+# The DB couldn't be reached (or had no free connection): spill and retry later.
+# Anything else (no such table, bad value, constraint) means the DB rejected the rows.
+def is_connection_error(error):
+    if isinstance(error, (pymysql.err.InterfaceError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, pymysql.err.OperationalError):
+        code = error.args[0] if error.args else 0
+        return code >= 2000 or code in RETRY_MYSQL_ERRORS
+    if isinstance(error, sqlite3.OperationalError):
+        return str(error).lower().startswith(RETRY_SQLITE_MESSAGES)
+    return False
+
+# insert columns per table (time column last, filled in by write())
+EVENT_COLUMNS = {
+    "accident_events": ["city", "area", "latitude", "longitude", "severity", "confidence_score", "image_name"],
+    "road_damage_events": ["city", "area", "latitude", "longitude", "damage_count", "damage_types", "severity", "image_name"],
+    "crowd_events": ["city", "area", "latitude", "longitude", "camera_id", "crowd_count", "severity", "image_name"],
+    "traffic_events": ["city", "area", "latitude", "longitude", "predicted_traffic", "congestion_level", "model_used"],
+    "air_quality_events": ["city", "monitoring_station", "latitude", "longitude", "aqi", "aqi_category"]
+}
+
+
+def insert_query(table):
+    time_col = ROLLUP_SOURCES[table][0]
+    columns = EVENT_COLUMNS[table] + [time_col]
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+
+
+def utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# numpy scalars → plain Python, so rows go through pymysql and json alike
+def _plain(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+class EventWriter:
+
+    def __init__(self, pool=None, write_behind=WRITE_BEHIND, queue_size=QUEUE_SIZE,
+                 batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, spill_path=SPILL_PATH,
+                 dead_letter_path=DEAD_LETTER_PATH, router=None):
+        self.router = router or (None if pool else get_router())      # explicit pool = no routing
+        self.pool = pool or get_pool()
+        self.write_behind = write_behind
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.dead_letter_path = dead_letter_path
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._flush_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._stats_lock = threading.Lock()                           # write() and the flusher both count
+        self._stopping = threading.Event()
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "spilled": 0, "replayed": 0, "dead_letter": 0}
+
+        self._thread = None
+        if write_behind:
+            self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+            self._thread.start()
+
+    # queue one event: table from EVENT_COLUMNS, values as a dict of its columns
+    def write(self, table, values):
+        time_col = ROLLUP_SOURCES[table][0]
+        event_time = values.get(time_col) or utc_now()
+        row = [_plain(values.get(column)) for column in EVENT_COLUMNS[table]]
+        row.append(event_time.strftime(TIME_FORMAT) if hasattr(event_time, "strftime") else event_time)
+        event = (table, row)
+
+        if not self.write_behind:
+            self._flush([event])
+            return
+
+        try:
+            self._queue.put(event, timeout=PUT_TIMEOUT)
+            self._count(queued=1)
+        except queue.Full:
+            # flusher can't keep up (DB slow/down): don't block the page any longer
+            self._spill([event])
+
+    def _run(self):
+        last_retry = time.monotonic()
+        while not self._stopping.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                self._flush(batch)
+            elif self.has_spill() and time.monotonic() - last_retry > RETRY_INTERVAL:
+                last_retry = time.monotonic()
+                self._flush([])
+
+    def _drain(self, block):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    # New rows first, then (separately) whatever was spilled earlier. Rows whose shard
+    # can't be reached are spilled / kept for the next replay; spilled rows only leave
+    # the disk once they are committed or dead-lettered.
+    def _flush(self, batch):
+        with self._flush_lock:
+            written, unreachable = self._write(batch)
+            self._spill(unreachable)
+            replayed, tables = self._replay()
+
+            self._count(written=written + replayed, replayed=replayed, batches=1)
+
+        for table in {table for table, _ in batch} | tables:
+            invalidate(table)
+        invalidate("event_rollups")
+        return not unreachable
+
+    # One transaction per shard (just the primary unless DB_SHARDS is set).
+    # Returns (rows written, rows whose shard couldn't be reached).
+    def _write(self, events):
+        by_host = {}
+        for table, row in events:
+            host = self.router.write_host(row[0]) if self.router else None              # city is column 0
+            by_host.setdefault(host, []).append((table, row))
+
+        written, unreachable = 0, []
+        for host, host_events in by_host.items():
+            pool = self.pool if host is None else get_pool(host)
+            try:
+                self._insert(pool, host_events)
+                written += len(host_events)
+            except Exception as e:
+                if is_connection_error(e):
+                    logger.warning("Event writer: DB unreachable (%s): %s", host or "primary", e)
+                    unreachable += host_events
+                    continue
+                logger.warning("Event writer: batch rejected (%s), retrying row by row: %s", host or "primary", e)
+                host_written, host_unreachable = self._write_rows(pool, host_events)
+                written += host_written
+                unreachable += host_unreachable
+        return written, unreachable
+
+    # isolate the rows the DB rejects: each row in its own transaction
+    def _write_rows(self, pool, events):
+        written = 0
+        for i, event in enumerate(events):
+            try:
+                self._insert(pool, [event])
+                written += 1
+            except Exception as e:
+                if is_connection_error(e):
+                    logger.warning("Event writer: DB unreachable: %s", e)
+                    return written, events[i:]
+                self._dead_letter(event, e)
+        return written, []
+
+    def _insert(self, pool, events):
+        by_table = {}
+        for table, row in events:
+            by_table.setdefault(table, []).append(row)
+
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            conn.begin()
+            for table, rows in by_table.items():
+                cursor.executemany(insert_query(table), rows)
+                label_index = EVENT_COLUMNS[table].index(ROLLUP_SOURCES[table][1])
+                record_events(cursor, table, [(row[0], row[label_index], row[-1]) for row in rows])
+            conn.commit()
+            cursor.close()
+
+    # Spilled rows in batch_size transactions; returns (rows written, tables touched)
+    def _replay(self):
+        spilled = self._read_spill()
+        if not spilled:
+            return 0, set()
+
+        written, unreachable = 0, []
+        for i in range(0, len(spilled), self.batch_size):
+            chunk_written, chunk_unreachable = self._write(spilled[i:i + self.batch_size])
+            written += chunk_written
+            unreachable += chunk_unreachable
+        self._keep_replay(unreachable)
+        return written, {table for table, _ in spilled}
+
+    def _dead_letter(self, event, error):
+        table, row = event
+        logger.error("Event writer: %s row rejected, moved to %s: %s",
+                     table, self.dead_letter_path or "nowhere (no dead-letter file)", error)
+        self._count(dead_letter=1)
+        if not self.dead_letter_path:
+            return
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"table": table, "row": row, "error": str(error)}) + "\n")
+
+    # replace the replay file with the spilled rows that still failed (or remove it)
+    def _keep_replay(self, events):
+        if not events:
+            os.remove(self._replay_path())
+            return
+        tmp_path = self._replay_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for table, row in events:
+                f.write(json.dumps({"table": table, "row": row}) + "\n")
+        os.replace(tmp_path, self._replay_path())
+
+    def _replay_path(self):
+        return self.spill_path + ".replay"
+
+    def has_spill(self):
+        return bool(self.spill_path) and (os.path.exists(self.spill_path) or os.path.exists(self._replay_path()))
+
+    def _spill(self, events):
+        if not events:
+            return
+        if not self.spill_path:
+            logger.error("Event writer: dropped %d events (no spill file)", len(events))
+            return
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for table, row in events:
+                    f.write(json.dumps({"table": table, "row": row}) + "\n")
+        self._count(spilled=len(events))
+
+    def _count(self, **counts):
+        with self._stats_lock:
+            for name, n in counts.items():
+                self.stats[name] += n
+
+    # Spilled events waiting for replay (called under _flush_lock). New spills are moved
+    # into the .replay file, which is removed only after its rows were committed.
+    def _read_spill(self):
+        if not self.has_spill():
+            return []
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                with open(self.spill_path, encoding="utf-8") as src, open(self._replay_path(), "a", encoding="utf-8") as dst:
+                    dst.write(src.read())
+                os.remove(self.spill_path)
+
+        with open(self._replay_path(), encoding="utf-8") as f:
+            events = [json.loads(line) for line in f if line.strip()]
+        return [(event["table"], event["row"]) for event in events]
+
+    # write out everything queued so far (also used at exit)
+    def flush(self):
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._flush(batch)
+
+    def close(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_event_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = EventWriter()
+                atexit.register(_writer.close)
+    return _writer
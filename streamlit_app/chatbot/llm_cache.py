@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# 💬 LLM response cache (one per process)
+# Key = sha256 of model + temperature + system prompt + full prompt. The prompt carries
+# the DB context rows, so once the data changes the key changes too and the old answer
+# is simply never asked for again. Memory tier is an LRU of LLM_CACHE_SIZE answers;
+# with LLM_CACHE_DIR set answers are also kept on disk (one JSON file each) and survive
+# restarts. Both tiers expire after LLM_CACHE_TTL seconds.
+
+TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))                   # seconds, 0 = cache off
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_SIZE", "256"))
+CACHE_DIR = os.getenv("LLM_CACHE_DIR", "")                        # empty = memory only
+
+
+def cache_key(model, temperature, system_prompt, prompt):
+    payload = json.dumps([model, temperature, system_prompt, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+
+    def __init__(self, ttl=TTL, max_entries=MAX_ENTRIES, cache_dir=CACHE_DIR):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()          # key → (response, expires_at)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _remember(self, key, response, expires_at):
+        self._entries[key] = (response, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry["expires_at"] < time.time():
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+        return entry["response"], entry["expires_at"]
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= now:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._remember(key, *entry)
+            self.stats["disk_hits"] += 1
+        return entry[0]
+
+    def put(self, key, response):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, response, expires_at)
+
+        if self.cache_dir:
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"response": response, "expires_at": expires_at}, f)
+            os.replace(tmp_path, self._path(key))
+
+    # cached response, or call generate() and cache what it returns
+    def get_or_generate(self, key, generate):
+        if self.ttl <= 0:
+            return generate()
+
+        response = self.get(key)
+        if response is None:
+            response = generate()
+            self.put(key, response)
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
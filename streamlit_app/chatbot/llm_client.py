@@ -1,6 +1,7 @@
 import os
 from groq import Groq
 from dotenv import load_dotenv
+from chatbot.llm_cache import cache_key, get_llm_cache
 
 load_dotenv()
 
@@ -8,16 +9,67 @@ client = Groq(
     api_key=os.getenv("GROQ_API_KEY")
 )
 
-def generate_response(prompt):
+MODEL = "llama-3.1-8b-instant"                                  # "llama-3.1-70b-versatile" also work
+TEMPERATURE = 0.3
+SYSTEM_PROMPT = "You are a Smart City AI assistant."
+
+
+def _complete(prompt):
     completion = client.chat.completions.create(
-        model="llama-3.1-8b-instant",                           # model="llama-3.1-70b-versatile" also work
+        model=MODEL,
         messages=[
-            {"role": "system", "content": "You are a Smart City AI assistant."},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.3
+        temperature=TEMPERATURE
     )
 
     return completion.choices[0].message.content
 
 
+def _stream(prompt):
+    stream = client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=TEMPERATURE,
+        stream=True
+    )
+
+    for chunk in stream:
+        token = chunk.choices[0].delta.content
+        if token:
+            yield token
+
+
+# Same prompt (question + DB context) → same answer from the cache, see chatbot/llm_cache.py
+def generate_response(prompt, use_cache=True):
+    if not use_cache:
+        return _complete(prompt)
+
+    key = cache_key(MODEL, TEMPERATURE, SYSTEM_PROMPT, prompt)
+    return get_llm_cache().get_or_generate(key, lambda: _complete(prompt))
+
+
+# Same as generate_response, but yields the answer token by token as Groq sends it.
+# A cached answer comes back as a single chunk; a fresh one is cached once the stream
+# has finished (not if the caller stops reading early).
+def stream_response(prompt, use_cache=True):
+    cache = get_llm_cache()
+    if not use_cache or cache.ttl <= 0:
+        yield from _stream(prompt)
+        return
+
+    key = cache_key(MODEL, TEMPERATURE, SYSTEM_PROMPT, prompt)
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    tokens = []
+    for token in _stream(prompt):
+        tokens.append(token)
+        yield token
+    cache.put(key, "".join(tokens))
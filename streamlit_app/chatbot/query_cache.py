@@ -0,0 +1,139 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# ⏱ Query result cache (TTL + LRU, one per process)
+# Sits in front of SQLAgent.fetch_dataframe and the dashboard's fetch_query.
+# Key = normalized SQL + params. Concurrent misses on the same key wait for a
+# single DB query, so N viewers cost about one query per TTL window.
+# Pages call invalidate(<table>) after inserting, so new events show up at once.
+
+DEFAULT_TTL = float(os.getenv("QUERY_CACHE_TTL", "30"))                   # seconds
+MAX_BYTES = int(float(os.getenv("QUERY_CACHE_MAX_MB", "64")) * 2**20)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TABLE_RE = re.compile(r"\b(?:from|join|into|update)\s+`?(\w+)`?", re.IGNORECASE)
+
+
+def normalize_sql(query):
+    return _WHITESPACE_RE.sub(" ", query).strip().rstrip(";").strip()
+
+
+def query_tables(query):
+    return {name.lower() for name in _TABLE_RE.findall(query)}
+
+
+class QueryCache:
+
+    def __init__(self, max_bytes=MAX_BYTES, default_ttl=DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.bytes = 0
+        self._entries = OrderedDict()          # key → (df, expires_at, size, tables)
+        self._inflight = {}                    # key → Event while one thread fetches
+        self._generation = 0                   # bumped by invalidate(); older fetches aren't stored
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def key(query, params=None):
+        return normalize_sql(query), repr(params)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _drop(self, key):
+        df, _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def _store(self, key, df, ttl, tables):
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+
+        self._entries[key] = (df, time.monotonic() + ttl, size, tables)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    # cached DataFrame for query, or run fetch() once and cache it (errors are not cached)
+    def get_or_fetch(self, query, fetch, params=None, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return fetch()
+
+        key = self.key(query, params)
+        while True:
+            with self._lock:
+                df = self._lookup(key)
+                if df is not None:
+                    self.stats["hits"] += 1
+                    return df.copy()
+
+                waiting = self._inflight.get(key)
+                if waiting is None:
+                    self._inflight[key] = threading.Event()
+                    self.stats["misses"] += 1
+                    generation = self._generation
+                    break
+
+            waiting.wait()
+
+        try:
+            df = fetch()
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, df, ttl, query_tables(key[0]))
+            return df.copy()
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    # drop every cached result that reads from table
+    def invalidate(self, table):
+        table = table.lower()
+        with self._lock:
+            self._generation += 1
+            stale = [key for key, entry in self._entries.items() if table in entry[3]]
+            for key in stale:
+                self._drop(key)
+            self.stats["invalidations"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryCache()
+    return _cache
+
+
+def invalidate(table):
+    get_query_cache().invalidate(table)
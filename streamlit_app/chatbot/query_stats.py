@@ -0,0 +1,200 @@
+import bisect
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+from dotenv import load_dotenv
+from chatbot.query_cache import normalize_sql
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+# 📊 Query instrumentation (one collector per process)
+# SQLAgent records every DB round trip: wall time, rows, bytes, and a fingerprint
+# (the SQL with literals replaced by ?), so the same panel query always lands in the
+# same row whatever its parameters. Latencies go into a fixed-bucket histogram;
+# queries slower than SLOW_QUERY_MS are appended to SLOW_QUERY_LOG.
+# "errors" counts failed round trips; "failed" counts reads that reached the caller as
+# an empty result because of an error (the last RECENT_FAILURES are kept with their message).
+# Bytes are the size of the returned DataFrame (pymysql doesn't expose wire bytes).
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "slow_queries.log")      # empty = print only
+
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]          # last bucket is > 5000
+RECENT_FAILURES = 50
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def fingerprint(query):
+    sql = normalize_sql(query)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("(?+)", sql)
+    return sql
+
+
+def fingerprint_id(fp):
+    return hashlib.md5(fp.encode("utf-8")).hexdigest()[:8]
+
+
+class QueryStats:
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, slow_log=SLOW_QUERY_LOG):
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self._lock = threading.Lock()
+        self._queries = {}          # fingerprint → counters + histogram
+        self._failures = deque(maxlen=RECENT_FAILURES)
+
+    # called under _lock
+    def _entry(self, fp):
+        entry = self._queries.get(fp)
+        if entry is None:
+            entry = self._queries[fp] = {
+                "calls": 0, "errors": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "rows": 0, "bytes": 0, "histogram": [0] * (len(BUCKETS_MS) + 1)
+            }
+        return entry
+
+    def record(self, query, seconds, rows=0, nbytes=0, error=None):
+        fp = fingerprint(query)
+        ms = seconds * 1000
+
+        with self._lock:
+            entry = self._entry(fp)
+            entry["calls"] += 1
+            entry["errors"] += error is not None
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["rows"] += rows
+            entry["bytes"] += nbytes
+            entry["histogram"][bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+        if ms >= self.slow_ms:
+            self._log_slow(fp, ms, rows, nbytes, error)
+
+    # a read the caller got back as an empty result because it failed
+    def record_failure(self, query, error):
+        fp = fingerprint(query)
+        with self._lock:
+            self._entry(fp)["failed"] += 1
+            self._failures.append({
+                "time": datetime.now(), "id": fingerprint_id(fp), "query": fp, "error": f"{type(error).__name__}: {error}"
+            })
+        logger.error("Query [%s] failed: %s", fingerprint_id(fp), error)
+
+    def _log_slow(self, fp, ms, rows, nbytes, error):
+        line = f"{datetime.now():%Y-%m-%d %H:%M:%S} {ms:.0f}ms rows={rows} bytes={nbytes} [{fingerprint_id(fp)}] {fp}"
+        if error is not None:
+            line += f" ERROR={error}"
+        logger.warning("Slow query: %s", line)
+        if self.slow_log:
+            with open(self.slow_log, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    # with stats.timed(query) as result: ...; result["rows"] = ..., result["bytes"] = ...
+    def timed(self, query):
+        return _Timer(self, query)
+
+    # p50 / p95 are read off the histogram (upper bound of the bucket)
+    def _percentile(self, histogram, q):
+        target = q * sum(histogram)
+        seen = 0
+        for i, count in enumerate(histogram):
+            seen += count
+            if seen >= target:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else float("inf")
+        return 0
+
+    # one row per fingerprint, slowest total first
+    def summary(self):
+        with self._lock:
+            items = [(fp, dict(entry, histogram=list(entry["histogram"]))) for fp, entry in self._queries.items()]
+
+        rows = []
+        for fp, entry in items:
+            rows.append({
+                "id": fingerprint_id(fp),
+                "query": fp,
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "failed": entry["failed"],
+                "avg_ms": round(entry["total_ms"] / entry["calls"], 1),
+                "p50_ms": self._percentile(entry["histogram"], 0.5),
+                "p95_ms": self._percentile(entry["histogram"], 0.95),
+                "max_ms": round(entry["max_ms"], 1),
+                "total_ms": round(entry["total_ms"], 1),
+                "rows": entry["rows"],
+                "bytes": entry["bytes"]
+            })
+        return pd.DataFrame(rows, columns=[
+            "id", "query", "calls", "errors", "failed", "avg_ms", "p50_ms", "p95_ms", "max_ms", "total_ms", "rows", "bytes"
+        ]).sort_values("total_ms", ascending=False, ignore_index=True)
+
+    # counts per latency bucket for one fingerprint id (or all queries), fastest bucket first;
+    # upper_ms is the numeric sort key (the labels don't sort as strings)
+    def histogram(self, query_id=None):
+        with self._lock:
+            counts = [0] * (len(BUCKETS_MS) + 1)
+            for fp, entry in self._queries.items():
+                if query_id is None or fingerprint_id(fp) == query_id:
+                    counts = [a + b for a, b in zip(counts, entry["histogram"])]
+        labels = [f"≤{b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        upper = [float(b) for b in BUCKETS_MS] + [float("inf")]
+        return pd.DataFrame({"bucket": labels, "upper_ms": upper, "queries": counts}).sort_values("upper_ms", ignore_index=True)
+
+    # newest first
+    def recent_failures(self):
+        with self._lock:
+            failures = list(self._failures)
+        return pd.DataFrame(failures[::-1], columns=["time", "id", "query", "error"])
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self._failures.clear()
+
+
+class _Timer:
+
+    def __init__(self, stats, query):
+        self.stats = stats
+        self.query = query
+        self.result = {"rows": 0, "bytes": 0}
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.result
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stats.record(
+            self.query, time.perf_counter() - self.start,
+            self.result["rows"], self.result["bytes"],
+            error=exc if isinstance(exc, Exception) else None          # not GeneratorExit
+        )
+        return False
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_query_stats():
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = QueryStats()
+    return _stats
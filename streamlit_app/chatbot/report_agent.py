@@ -4,12 +4,19 @@
 
 class ReportAgent:
 
-    def generate_report(self, llm_output):
-        report = f"""
+    # header / footer are separate so a streamed answer can be wrapped as it arrives
+    def header(self):
+        return """
         SMART CITY ANALYTICS REPORT
         -----------------------------
-        {llm_output}
+        """
+
+    def footer(self):
+        return """
         -----------------------------
         Generated by UrbanBot Intelligence System
         """
+
+    def generate_report(self, llm_output):
+        report = self.header() + llm_output + self.footer()
         return report
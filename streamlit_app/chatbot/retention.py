@@ -0,0 +1,293 @@
+import argparse
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from chatbot.db_pool import SHARDED_TABLES, get_pool, get_router, is_sqlite
+from chatbot.event_browser import event_filters
+from chatbot.query_cache import invalidate
+from chatbot.rollups import ROLLUP_SOURCES
+from chatbot.sql_agent import SQLAgent
+
+load_dotenv()
+
+
+# 🗃 Retention: move old events out of the hot tables into Parquet archives
+# Rows older than RETENTION_DAYS are written to ARCHIVE_DIR/<table>/month=YYYY-MM/*.parquet
+# (zstd), then deleted from the table, chunk by chunk. event_rollups is left alone, so
+# KPI / city totals still count archived events; compact() only rebuilds hours after
+# the table's archive horizon, which is kept in archive_horizons next to event_rollups
+# (same database, so it holds wherever compact runs from).
+# Archive files get one Arrow schema per table, built from the table's column types,
+# so every month reads back with the same types (even a chunk whose column is all NULL).
+# read_events() answers a time-range query from the hot table plus, before the horizon, the archive.
+# If a run stops between writing a chunk and deleting it, the rerun archives those rows
+# again; read_events() drops the duplicates.
+# With DB_SHARDS every shard keeps its own rows and horizon: `python -m chatbot.retention`
+# archives each database in turn into the same ARCHIVE_DIR. Ids are only unique per shard
+# (and a city lives on one shard), so rows are told apart by (city, id).
+
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "90"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+ARCHIVE_CHUNK_ROWS = 50_000
+DELETE_BATCH = 1_000
+
+# tables that get a row per prediction
+RETENTION_TABLES = ["accident_events", "crowd_events", "traffic_events", "air_quality_events"]
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# identifies an event row across shards
+ROW_KEY = ["city", "id"]
+
+HORIZON_DDL = """
+    CREATE TABLE IF NOT EXISTS archive_horizons (
+        event_table VARCHAR(32) NOT NULL PRIMARY KEY,
+        archived_before DATETIME NOT NULL
+    )
+"""
+
+# the horizon only ever moves forward
+SET_HORIZON_QUERY = {
+    "mysql": """
+        INSERT INTO archive_horizons (event_table, archived_before) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE archived_before = GREATEST(archived_before, VALUES(archived_before))
+    """,
+    "sqlite": """
+        INSERT INTO archive_horizons (event_table, archived_before) VALUES (%s, %s)
+        ON CONFLICT (event_table) DO UPDATE SET archived_before = MAX(archived_before, excluded.archived_before)
+    """
+}
+
+# horizon file of the first retention runs (ARCHIVE_DIR/<table>/_archived_before), moved into the DB
+LEGACY_HORIZON_FILE = "_archived_before"
+
+# DB column type (substring) → Arrow type of the archive column; anything else is a string
+ARROW_TYPES = [
+    (("int",), pa.int64()),
+    (("float", "double", "real", "decimal"), pa.float64()),
+    (("datetime", "timestamp"), pa.timestamp("us"))
+]
+
+
+def table_dir(table, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, table)
+
+
+def _time_text(value):
+    return value.strftime(TIME_FORMAT) if hasattr(value, "strftime") else value
+
+
+# Rows before this time live only in the archive (None = nothing archived yet).
+# cursor version for compact(), which reads it inside its transaction (HORIZON_DDL must have run).
+def read_horizon(cursor, table):
+    cursor.execute("SELECT archived_before FROM archive_horizons WHERE event_table = %s", (table,))
+    row = cursor.fetchone()
+    return _time_text(row[0]) if row else None
+
+
+def archived_before(table, pool=None):
+    with (pool or get_pool()).connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(HORIZON_DDL)
+        horizon = read_horizon(cursor, table)
+        cursor.close()
+    return horizon
+
+
+def _set_archived_before(table, cutoff, pool):
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(HORIZON_DDL)
+        cursor.execute(SET_HORIZON_QUERY["sqlite" if is_sqlite(conn) else "mysql"], (table, cutoff))
+        cursor.close()
+
+
+def _import_legacy_horizon(table, archive_dir, pool):
+    path = os.path.join(table_dir(table, archive_dir), LEGACY_HORIZON_FILE)
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        cutoff = f.read().strip()
+    if cutoff:
+        _set_archived_before(table, cutoff, pool)
+    os.remove(path)
+
+
+# whole days, so no rollup hour is split between archive and hot table
+def retention_cutoff(days=RETENTION_DAYS, now=None):
+    now = now or datetime.now(timezone.utc)
+    return (now - timedelta(days=days)).strftime("%Y-%m-%d 00:00:00")
+
+
+# (column, DB type) in table order
+def column_types(table, pool=None):
+    with (pool or get_pool()).connection() as conn:
+        cursor = conn.cursor()
+        if is_sqlite(conn):
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = [(row[1], row[2]) for row in cursor.fetchall()]
+        else:
+            cursor.execute("""
+                SELECT column_name, data_type FROM information_schema.columns
+                WHERE table_schema = DATABASE() AND table_name = %s
+                ORDER BY ordinal_position
+            """, (table,))
+            columns = [tuple(row) for row in cursor.fetchall()]
+        cursor.close()
+    return columns
+
+
+# Arrow schema of the archive files (the time column is a timestamp even where the DB stores text)
+def archive_schema(table, pool=None):
+    time_col = ROLLUP_SOURCES[table][0]
+    fields = []
+    for name, db_type in column_types(table, pool):
+        arrow_type = pa.timestamp("us") if name == time_col else pa.string()
+        if name != time_col:
+            for names, candidate in ARROW_TYPES:
+                if any(n in db_type.lower() for n in names):
+                    arrow_type = candidate
+                    break
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def write_archive(table, chunk, schema, archive_dir=ARCHIVE_DIR):
+    time_col = ROLLUP_SOURCES[table][0]
+    chunk = chunk.copy()
+    chunk[time_col] = pd.to_datetime(chunk[time_col])
+    stamp = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"               # unique across shards
+
+    for month, rows in chunk.groupby(chunk[time_col].dt.strftime("%Y-%m")):
+        month_dir = os.path.join(table_dir(table, archive_dir), f"month={month}")
+        os.makedirs(month_dir, exist_ok=True)
+        pq.write_table(
+            pa.Table.from_pandas(rows, schema=schema, preserve_index=False),
+            os.path.join(month_dir, f"part-{stamp}.parquet"),
+            compression="zstd"
+        )
+
+
+def delete_rows(table, ids, pool=None):
+    pool = pool or get_pool()
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        conn.begin()
+        for i in range(0, len(ids), DELETE_BATCH):
+            batch = ids[i:i + DELETE_BATCH]
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(batch))})", batch)
+        conn.commit()
+        cursor.close()
+
+
+# Archive + delete every row of table older than cutoff in one database (default: the
+# primary); returns the number of rows moved. Rows are read, deleted and the horizon set
+# through the same pool.
+def archive_table(table, cutoff, pool=None, archive_dir=ARCHIVE_DIR, chunk_size=ARCHIVE_CHUNK_ROWS):
+    pool = pool or get_pool()
+    reader = SQLAgent(pool=pool)                    # explicit pool: no replica / shard routing
+    time_col = ROLLUP_SOURCES[table][0]
+    schema = archive_schema(table, pool)
+
+    # horizon first: from now on compact() keeps the rollups of these hours
+    _import_legacy_horizon(table, archive_dir, pool)
+    _set_archived_before(table, cutoff, pool)
+
+    moved = 0
+    query = f"SELECT * FROM {table} WHERE {time_col} < %s ORDER BY id"
+    for chunk in reader.stream_dataframe(query, [cutoff], chunk_size):
+        write_archive(table, chunk, schema, archive_dir)
+        delete_rows(table, [int(i) for i in chunk["id"]], pool)
+        moved += len(chunk)
+
+    if moved:
+        invalidate(table)
+    print(f"Archived {table}: {moved} rows before {cutoff}")
+    return moved
+
+
+def archive_all(days=RETENTION_DAYS, tables=None, archive_dir=ARCHIVE_DIR, pool=None):
+    cutoff = retention_cutoff(days)
+    return {table: archive_table(table, cutoff, pool, archive_dir) for table in tables or RETENTION_TABLES}
+
+
+def _read_archive(table, start=None, end=None, city=None, label=None, archive_dir=ARCHIVE_DIR, schema=None):
+    path = table_dir(table, archive_dir)
+    files = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names if name.endswith(".parquet")]
+    if not files:
+        return pd.DataFrame()
+
+    time_col, label_col = ROLLUP_SOURCES[table]
+    dataset = ds.dataset(files, format="parquet", schema=schema)
+    condition = None
+    for expr in [
+        ds.field(time_col) >= pd.Timestamp(start) if start is not None else None,
+        ds.field(time_col) < pd.Timestamp(end) if end is not None else None,
+        ds.field("city") == city if city is not None else None,
+        ds.field(label_col) == label if label is not None else None
+    ]:
+        if expr is not None:
+            condition = expr if condition is None else condition & expr
+
+    df = dataset.to_table(filter=condition).to_pandas()
+    return df.drop_duplicates(ROW_KEY, keep="last")
+
+
+# Latest archive horizon of the databases agent reads table from: each shard has its own,
+# and the archive holds rows from every one of them.
+def _latest_horizon(table, agent):
+    router = agent.router
+    if router is None or not router.sharded or table not in SHARDED_TABLES:
+        return archived_before(table, agent.pool)
+    horizons = [archived_before(table, get_pool(host)) for host in router.shard_hosts()]
+    horizons = [h for h in horizons if h is not None]
+    return max(horizons, key=pd.Timestamp) if horizons else None
+
+
+# Events of one table across hot + archived rows, newest first.
+# The hot table is always read (the horizon is set before rows move, so rows before it
+# can still be there; the time index keeps an empty range cheap), and a failed read is
+# raised rather than returned as "archived rows only". The archive is only read when the
+# range starts before the archive horizon.
+def read_events(table, start=None, end=None, city=None, label=None, agent=None, archive_dir=ARCHIVE_DIR):
+    agent = agent or SQLAgent()
+    time_col = ROLLUP_SOURCES[table][0]
+    horizon = _latest_horizon(table, agent)
+
+    frames = []
+    where, params = event_filters(table, start, end, city, label)
+    query = f"SELECT * FROM {table}" + (" WHERE " + " AND ".join(where) if where else "")
+    hot = agent.fetch_dataframe(query, params, ttl=0, raise_errors=True)
+    if not hot.empty:
+        hot[time_col] = pd.to_datetime(hot[time_col])
+        frames.append(hot)
+
+    if horizon is not None and (start is None or pd.Timestamp(start) < pd.Timestamp(horizon)):
+        archived = _read_archive(table, start, end, city, label, archive_dir, archive_schema(table, agent.pool))
+        if not archived.empty:
+            frames.append(archived)
+
+    if not frames:
+        return pd.DataFrame()
+    events = pd.concat(frames, ignore_index=True).drop_duplicates(ROW_KEY, keep="first")
+    return events.sort_values([time_col, "id"], ascending=False, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive event rows older than the retention horizon")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS)
+    parser.add_argument("--table", choices=list(ROLLUP_SOURCES), action="append", help=f"default: {', '.join(RETENTION_TABLES)}")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    # every database: the primary, then each city shard
+    for host in get_router().shard_hosts():
+        print(f"== {host} ==")
+        archive_all(args.days, args.table, args.archive_dir, get_pool(host))
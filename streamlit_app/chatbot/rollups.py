@@ -0,0 +1,187 @@
+import argparse
+import pymysql
+from chatbot.db_pool import get_pool, get_router, is_sqlite
+
+
+# 📈 Event rollups: counts per table × city × label × hour
+# Kept up to date by record_event() next to every page insert, and rebuilt from the
+# raw tables by compact() (first run, after bulk loads, or as a periodic job to fix
+# any drift). Summary / KPI reads then scan this small table instead of the raw
+# event tables, so their latency stays flat as the event tables grow.
+
+# event table → (time column, label column the dashboard filters on)
+ROLLUP_SOURCES = {
+    "accident_events": ("event_time", "severity"),
+    "road_damage_events": ("event_time", "severity"),
+    "crowd_events": ("event_time", "severity"),
+    "traffic_events": ("event_time", "congestion_level"),
+    "air_quality_events": ("timestamp", "aqi_category"),
+    "nlp_complaints": ("created_at", "priority")
+}
+
+ROLLUP_DDL = """
+    CREATE TABLE IF NOT EXISTS event_rollups (
+        event_table VARCHAR(32) NOT NULL,
+        city VARCHAR(64) NOT NULL,
+        label VARCHAR(32) NOT NULL,
+        hour DATETIME NOT NULL,
+        events INT NOT NULL,
+        PRIMARY KEY (event_table, city, label, hour)
+    )
+"""
+
+# event time defaults to NOW() (rows inserted with the table's CURRENT_TIMESTAMP default)
+BUMP_QUERY = """
+    INSERT INTO event_rollups (event_table, city, label, hour, events)
+    VALUES (%s, %s, %s, DATE_FORMAT(COALESCE(%s, NOW()), '%%Y-%%m-%%d %%H:00:00'), %s)
+    ON DUPLICATE KEY UPDATE events = events + VALUES(events)
+"""
+
+SQLITE_BUMP_QUERY = """
+    INSERT INTO event_rollups (event_table, city, label, hour, events)
+    VALUES (%s, %s, %s, strftime('%%Y-%%m-%%d %%H:00:00', COALESCE(%s, datetime('now'))), %s)
+    ON CONFLICT (event_table, city, label, hour) DO UPDATE SET events = events + excluded.events
+"""
+
+# hour bucket of a time column, per backend
+HOUR_EXPR = {
+    "mysql": "DATE_FORMAT({}, '%%Y-%%m-%%d %%H:00:00')",
+    "sqlite": "strftime('%%Y-%%m-%%d %%H:00:00', {})"
+}
+
+# rows without a time (complaints whose open_dt didn't parse) are counted under this hour
+UNDATED_HOUR = "1970-01-01 00:00:00"
+
+# small result: one row per table × city × label
+ROLLUP_TOTALS_QUERY = """
+    SELECT event_table, city, label, SUM(events) total
+    FROM event_rollups
+    GROUP BY event_table, city, label
+"""
+
+NO_SUCH_TABLE = 1146
+
+
+# Call with the page's cursor right after its INSERT.
+# Until compact() has created (and backfilled) the table this is a no-op.
+def record_event(cursor, table, city, label, event_time=None):
+    record_events(cursor, table, [(city, label, event_time)])
+
+
+# "YYYY-MM-DD HH:00:00" of a datetime or a "YYYY-MM-DD HH:MM:SS" string (None = the DB's NOW())
+def hour_bucket(event_time):
+    if event_time is None:
+        return None
+    if hasattr(event_time, "strftime"):
+        return event_time.strftime("%Y-%m-%d %H:00:00")
+    return str(event_time)[:13] + ":00:00"
+
+
+# Same for a batch of inserted rows: [(city, label, event_time), ...], one upsert per hour bucket
+def record_events(cursor, table, events):
+    counts = {}
+    for city, label, event_time in events:
+        key = (table, city or "", label or "", hour_bucket(event_time))
+        counts[key] = counts.get(key, 0) + 1
+
+    try:
+        query = SQLITE_BUMP_QUERY if is_sqlite(cursor) else BUMP_QUERY
+        cursor.executemany(query, [key + (n,) for key, n in counts.items()])
+    except pymysql.err.ProgrammingError as e:
+        if e.args[0] != NO_SUCH_TABLE:
+            raise
+
+
+# whether event_rollups exists yet (on MySQL it is created by the first compact())
+def rollups_built(pool=None):
+    with (pool or get_pool()).connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1 FROM event_rollups LIMIT 1")
+            cursor.fetchall()
+            return True
+        except pymysql.err.ProgrammingError as e:
+            if e.args[0] != NO_SUCH_TABLE:
+                raise
+            return False
+        finally:
+            cursor.close()
+
+
+# Rebuild the rollups of every (or one) event table from the raw rows, in one transaction.
+# Hours before a table's archive horizon (archive_horizons, see chatbot/retention.py) are
+# no longer in the raw table, so their rollup rows are kept as they are.
+def compact(tables=None, pool=None):
+    from chatbot.retention import HORIZON_DDL, read_horizon
+
+    pool = pool or get_pool()
+
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(ROLLUP_DDL)
+        cursor.execute(HORIZON_DDL)
+        hour_expr = HOUR_EXPR["sqlite" if is_sqlite(conn) else "mysql"]
+
+        conn.begin()
+        for table in tables or ROLLUP_SOURCES:
+            time_col, label_col = ROLLUP_SOURCES[table]
+            since = read_horizon(cursor, table)
+            if since is None:
+                cursor.execute("DELETE FROM event_rollups WHERE event_table = %s", (table,))
+                where, params = "", (table,)
+            else:
+                cursor.execute("DELETE FROM event_rollups WHERE event_table = %s AND hour >= %s", (table, since))
+                where, params = f"WHERE {time_col} >= %s", (table, since)
+
+            cursor.execute(f"""
+                INSERT INTO event_rollups (event_table, city, label, hour, events)
+                SELECT %s, COALESCE(city, ''), COALESCE({label_col}, ''),
+                       COALESCE({hour_expr.format(time_col)}, '{UNDATED_HOUR}'), COUNT(*)
+                FROM {table}
+                {where}
+                GROUP BY 2, 3, 4
+            """, params)
+            print(f"Compacted {table}: {cursor.rowcount} rollup rows")
+        conn.commit()
+        cursor.close()
+
+
+# (metric, city, total) rows in the same shape as KPI_SNAPSHOT_QUERY, from the rollup totals
+def kpi_rows(totals):
+    label = totals["label"].str.upper()
+    metrics = {
+        "accidents": totals["event_table"] == "accident_events",
+        "road_issues": totals["event_table"] == "road_damage_events",
+        "high_traffic": (totals["event_table"] == "traffic_events") & (label == "HIGH"),
+        "aqi_alerts": (totals["event_table"] == "air_quality_events") & label.isin(["POOR", "SEVERE"]),
+        "overcrowding": (totals["event_table"] == "crowd_events") & (label == "OVERCROWDED"),
+        "high_complaints": (totals["event_table"] == "nlp_complaints") & (label == "HIGH")
+    }
+
+    rows = []
+    for metric, mask in metrics.items():
+        by_city = totals[mask].groupby("city", dropna=False)["total"].sum()
+        if metric in ("overcrowding", "high_complaints"):
+            rows += [(metric, city, int(total)) for city, total in by_city.items()]
+        else:
+            rows.append((metric, None, int(by_city.sum())))
+    return rows
+
+
+# city → total for one table (optionally one label), like the GROUP BY city queries
+def city_totals(totals, table, label=None):
+    mask = totals["event_table"] == table
+    if label is not None:
+        mask &= totals["label"].str.upper() == label.upper()
+    return totals[mask].groupby("city", as_index=False, dropna=False)["total"].sum()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild event_rollups from the raw event tables")
+    parser.add_argument("--table", choices=list(ROLLUP_SOURCES), action="append", help="default: every table")
+    args = parser.parse_args()
+
+    # each database keeps its own rollups: the primary, then each city shard
+    for host in get_router().shard_hosts():
+        print(f"== {host} ==")
+        compact(args.table, get_pool(host))
@@ -0,0 +1,270 @@
+import argparse
+import sys
+import pymysql
+from chatbot.db_pool import DB_BACKEND, get_pool, get_router
+from chatbot.rollups import ROLLUP_SOURCES, ROLLUP_TOTALS_QUERY
+from chatbot.event_browser import changes_query, page_query
+from chatbot.sql_agent import CHATBOT_QUERIES, CITY_SUMMARY_QUERIES, HOTSPOTS_QUERY, KPI_SNAPSHOT_QUERY
+
+
+# 🗄 Versioned schema for the event tables
+# python -m chatbot.schema migrate   → apply pending migrations (recorded in schema_migrations)
+# python -m chatbot.schema status    → applied versions
+# python -m chatbot.schema check     → EXPLAIN every app query, flag full scans
+# Tables may already exist (they used to be created by hand): table DDL is
+# CREATE IF NOT EXISTS and indexes are only added when missing.
+# event_rollups is not created here: `python -m chatbot.rollups` creates and backfills it.
+
+MIGRATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT NOT NULL PRIMARY KEY,
+        description VARCHAR(255) NOT NULL,
+        applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+EVENT_TABLES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS accident_events (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        city VARCHAR(64),
+        area VARCHAR(128),
+        latitude DOUBLE,
+        longitude DOUBLE,
+        severity VARCHAR(32),
+        confidence_score FLOAT,
+        image_name VARCHAR(255),
+        event_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS road_damage_events (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        city VARCHAR(64),
+        area VARCHAR(128),
+        latitude DOUBLE,
+        longitude DOUBLE,
+        damage_count INT,
+        damage_types VARCHAR(255),
+        severity VARCHAR(32),
+        image_name VARCHAR(255),
+        event_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS crowd_events (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        city VARCHAR(64),
+        area VARCHAR(128),
+        latitude DOUBLE,
+        longitude DOUBLE,
+        camera_id VARCHAR(64),
+        crowd_count INT,
+        severity VARCHAR(32),
+        image_name VARCHAR(255),
+        event_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS traffic_events (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        city VARCHAR(64),
+        area VARCHAR(128),
+        latitude DOUBLE,
+        longitude DOUBLE,
+        predicted_traffic FLOAT,
+        congestion_level VARCHAR(32),
+        model_used VARCHAR(32),
+        event_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS air_quality_events (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        city VARCHAR(64),
+        monitoring_station VARCHAR(128),
+        latitude DOUBLE,
+        longitude DOUBLE,
+        aqi FLOAT,
+        aqi_category VARCHAR(32),
+        timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS nlp_complaints (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        source_key CHAR(40) NULL,
+        city VARCHAR(64),
+        category VARCHAR(255),
+        department VARCHAR(64),
+        complaint_text TEXT,
+        sentiment VARCHAR(16),
+        priority VARCHAR(16),
+        created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE KEY uq_nlp_complaints_source_key (source_key)
+    )
+    """
+]
+
+
+# Every hot query is "newest first", "per city", or "filter on severity/priority, group by city":
+#   (time)           → ORDER BY time DESC LIMIT n
+#   (city, time)     → GROUP BY city / one city's events in a time range
+#   (label, city)    → WHERE severity='...' GROUP BY city
+def event_indexes():
+    indexes = []
+    for table, (time_col, label_col) in ROLLUP_SOURCES.items():
+        indexes += [
+            (table, f"idx_{table}_time", [time_col]),
+            (table, f"idx_{table}_city_time", ["city", time_col]),
+            (table, f"idx_{table}_{label_col}_city", [label_col, "city"])
+        ]
+    return indexes
+
+
+def index_exists(cursor, table, name):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, name))
+    return cursor.fetchone()[0] > 0
+
+
+def add_indexes(cursor):
+    for table, name, columns in event_indexes():
+        if index_exists(cursor, table, name):
+            continue
+        cursor.execute(f"ALTER TABLE {table} ADD INDEX {name} ({', '.join(columns)})")
+        print(f"  + {table}.{name} ({', '.join(columns)})")
+
+
+# source_key came with the bulk loader; hand-made nlp_complaints tables may lack it
+def add_source_key(cursor):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = 'nlp_complaints' AND column_name = 'source_key'
+    """)
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("""
+            ALTER TABLE nlp_complaints
+            ADD COLUMN source_key CHAR(40) NULL,
+            ADD UNIQUE KEY uq_nlp_complaints_source_key (source_key)
+        """)
+
+
+# (version, description, steps) — a step is a SQL string or a function(cursor). Append only.
+MIGRATIONS = [
+    (1, "event tables", EVENT_TABLES_DDL + [add_source_key]),
+    (2, "composite indexes on time / city / severity", [add_indexes]),
+    (3, "nlp_complaints.created_at nullable (unparseable open_dt)", [
+        "ALTER TABLE nlp_complaints MODIFY created_at DATETIME NULL DEFAULT CURRENT_TIMESTAMP"
+    ])
+]
+
+
+def applied_versions(cursor):
+    cursor.execute(MIGRATIONS_DDL)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+# MySQL DDL commits implicitly, so each migration is recorded right after its steps ran
+def migrate(pool=None):
+    pool = pool or get_pool()
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        done = applied_versions(cursor)
+
+        for version, description, steps in MIGRATIONS:
+            if version in done:
+                continue
+            print(f"Migration {version}: {description}")
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description)
+            )
+        cursor.close()
+
+    print("Schema up to date (version", MIGRATIONS[-1][0], ")")
+
+
+def status(pool=None):
+    pool = pool or get_pool()
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        done = applied_versions(cursor)
+        cursor.close()
+
+    for version, description, _ in MIGRATIONS:
+        print(f"{'✔' if version in done else '✘'} {version}: {description}")
+
+
+# every query the app sends, by name: query or (query, sample params)
+def app_queries():
+    queries = {"kpi_snapshot": KPI_SNAPSHOT_QUERY, "rollup_totals": ROLLUP_TOTALS_QUERY, "hotspots": HOTSPOTS_QUERY}
+    queries.update({f"city_summary.{k}": q for k, q in CITY_SUMMARY_QUERIES.items()})
+    queries.update({f"chatbot.{k}": q for k, q in CHATBOT_QUERIES.items()})
+
+    cursor = ("2024-01-01 00:00:00", 1)
+    for table in ROLLUP_SOURCES:
+        queries[f"browse.{table}.latest"] = page_query(table, limit=5)
+        queries[f"browse.{table}.city_page"] = page_query(table, city="Chennai", cursor=cursor)
+        queries[f"browse.{table}.changes"] = changes_query(table, cursor)
+    return queries
+
+
+# EXPLAIN each query; a plan row with type=ALL over at least min_rows rows is a full scan
+def check(pool=None, min_rows=1000):
+    pool = pool or get_pool()
+    full_scans = []
+
+    with pool.connection() as conn:
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        for name, query in app_queries().items():
+            query, params = query if isinstance(query, tuple) else (query, None)
+            try:
+                cursor.execute("EXPLAIN " + query, params)
+            except pymysql.MySQLError as e:
+                print(f"?  {name}: {e}")
+                continue
+
+            for plan in cursor.fetchall():
+                line = f"{name}: {plan['table']} type={plan['type']} key={plan['key']} rows={plan['rows']}"
+                if plan["type"] == "ALL" and (plan["rows"] or 0) >= min_rows:
+                    full_scans.append(line)
+                    print("✘ ", line)
+                else:
+                    print("✔ ", line)
+        cursor.close()
+
+    print(f"\n{len(full_scans)} full scan(s)")
+    return full_scans
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Event table schema: migrations and index check")
+    parser.add_argument("command", choices=["migrate", "status", "check"])
+    parser.add_argument("--min-rows", type=int, default=1000, help="check: ignore full scans of smaller tables")
+    args = parser.parse_args()
+
+    if DB_BACKEND == "sqlite":
+        sys.exit("chatbot.schema manages the MySQL schema; the SQLite backend creates its tables on connect")
+
+    # every database: the primary, then each city shard (same schema everywhere)
+    full_scans = []
+    for host in get_router().shard_hosts():
+        print(f"== {host} ==")
+        pool = get_pool(host)
+        if args.command == "migrate":
+            migrate(pool)
+        elif args.command == "status":
+            status(pool)
+        else:
+            full_scans += check(pool, min_rows=args.min_rows)
+    if full_scans:
+        sys.exit(1)
@@ -0,0 +1,81 @@
+import nltk
+from textblob import TextBlob
+from nltk.sentiment import SentimentIntensityAnalyzer
+
+
+# 🗣 Shared complaint sentiment scoring
+# One label scheme for the batch job (nlp_complaints.py) and the Sentiment page.
+# Labels are upper-case, which is what the dashboard and chatbot filter on.
+
+BACKENDS = ["textblob", "vader"]
+DEFAULT_BACKEND = "textblob"
+
+# VADER's documented cut-off on the compound score (TextBlob uses any non-zero polarity)
+VADER_CUTOFF = 0.05
+
+PRIORITY = {
+    "NEGATIVE": "HIGH",
+    "NEUTRAL": "MEDIUM",
+    "POSITIVE": "LOW"
+}
+
+# analyzers are built on first use and reused (once per process)
+_scorers = {}
+
+
+def _build_scorer(backend):
+    if backend == "textblob":
+        return lambda text: TextBlob(text).sentiment.polarity
+
+    if backend == "vader":
+        try:
+            sia = SentimentIntensityAnalyzer()
+        except LookupError:
+            nltk.download("vader_lexicon", quiet=True)
+            sia = SentimentIntensityAnalyzer()
+        return lambda text: sia.polarity_scores(text)["compound"]
+
+    raise ValueError(f"Unknown sentiment backend: {backend} (use one of {BACKENDS})")
+
+
+def get_scorer(backend=DEFAULT_BACKEND):
+    if backend not in _scorers:
+        _scorers[backend] = _build_scorer(backend)
+    return _scorers[backend]
+
+
+# Raw scores (polarity / compound) for a batch of texts
+def score_values(texts, backend=DEFAULT_BACKEND):
+    scorer = get_scorer(backend)
+    return [scorer(text) for text in texts]
+
+
+def sentiment_label(score, backend=DEFAULT_BACKEND):
+    if backend == "vader":
+        positive, negative = score >= VADER_CUTOFF, score <= -VADER_CUTOFF
+    else:
+        positive, negative = score > 0, score < 0
+
+    if positive:
+        return "POSITIVE"
+    elif negative:
+        return "NEGATIVE"
+    else:
+        return "NEUTRAL"
+
+
+def priority_label(sentiment):
+    return PRIORITY[sentiment]
+
+
+# Batch API: [(sentiment, priority), ...] in input order
+def score_batch(texts, backend=DEFAULT_BACKEND):
+    labels = []
+    for score in score_values(texts, backend):
+        sentiment = sentiment_label(score, backend)
+        labels.append((sentiment, priority_label(sentiment)))
+    return labels
+
+
+def score_text(text, backend=DEFAULT_BACKEND):
+    return score_batch([text], backend)[0]
@@ -1,49 +1,270 @@
-import pymysql
 import os
 import pandas as pd
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from chatbot.db_pool import get_pool, get_router, streaming_cursor
+from chatbot.query_cache import get_query_cache, query_tables
+from chatbot.query_stats import get_query_stats
+from chatbot.rollups import ROLLUP_TOTALS_QUERY, city_totals, kpi_rows
+
+# read summary / KPI counts from event_rollups (falls back to the raw tables until it exists)
+USE_ROLLUPS = os.getenv("DB_USE_ROLLUPS", "1") == "1"
+
+STREAM_CHUNK_SIZE = 50_000          # rows per DataFrame from stream_dataframe
+
+
+# All dashboard KPIs in one round trip: (metric, city, total) rows.
+# The overcrowding / high-complaint totals are summed from their per-city rows,
+# so those two tables are scanned once each.
+KPI_SNAPSHOT_QUERY = """
+SELECT 'accidents' metric, NULL city, COUNT(*) total FROM accident_events
+UNION ALL
+SELECT 'road_issues', NULL, COUNT(*) FROM road_damage_events
+UNION ALL
+SELECT 'high_traffic', NULL, COUNT(*) FROM traffic_events WHERE congestion_level='High'
+UNION ALL
+SELECT 'aqi_alerts', NULL, COUNT(*) FROM air_quality_events WHERE aqi_category IN ('Poor','Severe')
+UNION ALL
+SELECT 'overcrowding', city, COUNT(*) FROM crowd_events WHERE severity='Overcrowded' GROUP BY city
+UNION ALL
+SELECT 'high_complaints', city, COUNT(*) FROM nlp_complaints WHERE priority='HIGH' GROUP BY city
+"""
+
+
+# city → count breakdowns (raw fallback for get_city_summary)
+CITY_SUMMARY_QUERIES = {
+    "accidents": "SELECT city, COUNT(*) total FROM accident_events GROUP BY city",
+    "complaints": "SELECT city, COUNT(*) total FROM nlp_complaints GROUP BY city",
+    "crowd": "SELECT city, COUNT(*) total FROM crowd_events WHERE severity='Overcrowded' GROUP BY city"
+}
+
+# How one query's rows from several shards are combined: its ORDER BY as
+# (column, ascending) pairs and its LIMIT, applied again to the appended rows.
+@dataclass(frozen=True)
+class ShardMerge:
+    order_by: tuple = ()
+    limit: int = None
+
+
+# chatbot context per topic
+CHATBOT_QUERIES = {
+    "accident": "SELECT city, severity, confidence_score, event_time FROM accident_events ORDER BY event_time DESC LIMIT 10",
+    "traffic": "SELECT city, predicted_traffic, congestion_level, event_time FROM traffic_events ORDER BY event_time DESC LIMIT 5",
+    "aqi": "SELECT city, aqi, aqi_category, timestamp FROM air_quality_events ORDER BY timestamp DESC LIMIT 5",
+    "road": "SELECT city, area, damage_count, event_time FROM road_damage_events ORDER BY event_time DESC LIMIT 5",
+    "crowd": "SELECT city, camera_id, crowd_count, severity, event_time FROM crowd_events ORDER BY event_time DESC LIMIT 5",
+    "complaints": "SELECT city, category, sentiment, priority, created_at FROM nlp_complaints ORDER BY created_at DESC LIMIT 5"
+}
+
+# the same ORDER BY / LIMIT, for merging the chatbot queries' rows across city shards
+CHATBOT_MERGES = {
+    "accident": ShardMerge((("event_time", False),), 10),
+    "traffic": ShardMerge((("event_time", False),), 5),
+    "aqi": ShardMerge((("timestamp", False),), 5),
+    "road": ShardMerge((("event_time", False),), 5),
+    "crowd": ShardMerge((("event_time", False),), 5),
+    "complaints": ShardMerge((("created_at", False),), 5)
+}
+
+HOTSPOTS_QUERY = """
+    SELECT cell_lat, cell_lon, SUM(complaints) complaints
+    FROM complaint_hotspots
+    WHERE priority='HIGH'
+    GROUP BY cell_id, cell_lat, cell_lon
+    ORDER BY complaints DESC
+    LIMIT 50
+"""
+
+
+# Client-side merge of one query's results from several shards: rows are appended,
+# then sorted / cut by merge (a ShardMerge) when given.
+# Aggregates merge by appending because every city lives on one shard — group by city
+# (the KPI snapshot's city-less totals are summed by KpiSnapshot.from_rows).
+def merge_shards(frames, merge=None):
+    non_empty = [f for f in frames if not f.empty]
+    merged = pd.concat(non_empty, ignore_index=True) if non_empty else frames[0]
+    if merge is None or merged.empty:
+        return merged
+
+    if merge.order_by:
+        by = [column for column, _ in merge.order_by]
+        ascending = [asc for _, asc in merge.order_by]
+        merged = merged.sort_values(by, ascending=ascending, ignore_index=True)
+    return merged if merge.limit is None else merged.head(merge.limit)
+
+
+def _empty_city_totals():
+    return pd.DataFrame({"city": pd.Series(dtype=object), "total": pd.Series(dtype="int64")})
+
+
+@dataclass
+class KpiSnapshot:
+    accidents: int = 0
+    road_issues: int = 0
+    overcrowding: int = 0
+    high_traffic: int = 0
+    aqi_alerts: int = 0
+    high_complaints: int = 0
+    overcrowding_by_city: pd.DataFrame = field(default_factory=_empty_city_totals)      # city, total
+    complaints_by_city: pd.DataFrame = field(default_factory=_empty_city_totals)        # city, total
+
+    @classmethod
+    def from_rows(cls, rows):
+        if rows.empty:
+            return cls()
+
+        totals = rows.groupby("metric")["total"].sum()
+        by_city = {
+            metric: rows.loc[rows["metric"] == metric, ["city", "total"]].reset_index(drop=True)
+            for metric in ["overcrowding", "high_complaints"]
+        }
+        return cls(
+            accidents=int(totals.get("accidents", 0)),
+            road_issues=int(totals.get("road_issues", 0)),
+            overcrowding=int(totals.get("overcrowding", 0)),
+            high_traffic=int(totals.get("high_traffic", 0)),
+            aqi_alerts=int(totals.get("aqi_alerts", 0)),
+            high_complaints=int(totals.get("high_complaints", 0)),
+            overcrowding_by_city=by_city["overcrowding"],
+            complaints_by_city=by_city["high_complaints"]
+        )
 
-load_dotenv()
 
 class SQLAgent:
 
-    def __init__(self):
-        pass
+    # router: read/write routing + shards (chatbot/db_pool.py); an explicit pool turns routing off
+    def __init__(self, pool=None, cache=None, use_rollups=USE_ROLLUPS, stats=None, router=None):
+        self.router = router or (None if pool else get_router())
+        self.pool = pool or get_pool()
+        self.cache = cache or get_query_cache()
+        self.stats = stats or get_query_stats()
+        self.use_rollups = use_rollups
 
+    # Unpooled connection to the agent's database (callers that need their own session)
     def get_connection(self):
-        return pymysql.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME"),
-            port=3306
-        )
+        return self.pool.unpooled()
+
+    # every DB round trip is timed (cache hits aren't), see chatbot/query_stats.py
+    def _read_one(self, pool, query, params=None):
+        with self.stats.timed(query) as result:
+            with pool.connection() as conn:
+                df = pd.read_sql(query, conn, params=params)
+            result["rows"] = len(df)
+            result["bytes"] = int(df.memory_usage(deep=True).sum())
+        return df
 
-# Execute SQL query, Return DataFrame
-    def fetch_dataframe(self, query):
+    def _read(self, query, params=None, merge=None):
+        pools = [self.pool] if self.router is None else self.router.read_pools(query_tables(query))
+        if len(pools) == 1:
+            return self._read_one(pools[0], query, params)
+
+        with ThreadPoolExecutor(max_workers=len(pools)) as executor:
+            frames = list(executor.map(lambda pool: self._read_one(pool, query, params), pools))
+        return merge_shards(frames, merge)
+
+# Execute SQL query (cached for ttl seconds, 0 = always hit the DB), Return DataFrame
+# A failed read comes back as an empty DataFrame, or is raised with raise_errors=True
+# (callers that must not mistake "DB down" for "no rows").
+# merge: a ShardMerge for an ORDER BY ... LIMIT query over sharded tables (else rows are only appended)
+    def fetch_dataframe(self, query, params=None, ttl=None, raise_errors=False, merge=None):
         try:
-            conn = self.get_connection()
-            df = pd.read_sql(query, conn)
-            conn.close()
-            return df
+            return self.cache.get_or_fetch(query, lambda: self._read(query, params, merge), params, ttl)
         except Exception as e:
-            print("SQL Error:", e)
+            self.stats.record_failure(query, e)           # logged + shown on the Query Performance panel
+            if raise_errors:
+                raise
             return pd.DataFrame()
 
+# Large reads: unbuffered (server-side) cursor → DataFrame chunks of chunk_size rows
+# Only one chunk is held in memory at a time. Runs on its own (unpooled) connection,
+# so a long export doesn't hold a pool slot, and is never cached.
+# Reads go where _read() sends them: the agent's pool, a read replica, or every city
+# shard in turn (one shard's chunks after the other, not merged or re-ordered).
+    def stream_dataframe(self, query, params=None, chunk_size=STREAM_CHUNK_SIZE):
+        pools = [self.pool] if self.router is None else self.router.read_pools(query_tables(query))
+        for pool in pools:
+            yield from self._stream_one(pool, query, params, chunk_size)
+
+    def _stream_one(self, pool, query, params, chunk_size):
+        conn = pool.unpooled()
+        try:
+            with self.stats.timed(query) as result:
+                cursor = streaming_cursor(conn)
+                cursor.execute(query, params)
+                columns = [col[0] for col in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    chunk = pd.DataFrame.from_records(rows, columns=columns)
+                    result["rows"] += len(chunk)
+                    result["bytes"] += int(chunk.memory_usage(deep=True).sum())
+                    yield chunk
+        finally:
+            conn.close()
+
+# Independent queries in parallel, one pooled connection each:
+# {name: query or (query, params)} → {name: DataFrame}
+# Latency ≈ the slowest query instead of the sum (at most pool size at a time)
+# With return_errors=True a failed query's value is its exception instead of an empty DataFrame.
+    def fetch_many(self, queries, ttl=None, return_errors=False):
+        if not queries:
+            return {}
+        workers = min(len(queries), self.pool.size)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for name, query in queries.items():
+                query, params = query if isinstance(query, tuple) else (query, None)
+                futures[name] = executor.submit(self.fetch_dataframe, query, params, ttl, return_errors)
+            return {name: future.exception() or future.result() for name, future in futures.items()}
+
+# One query per shard, results kept apart: {host: (query, params)} → {host: DataFrame}
+# For callers that track where each row came from (ids are only unique per shard).
+# Never cached; a failed shard is recorded and raised.
+    def read_shards(self, queries):
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            futures = {
+                host: executor.submit(self._read_one, get_pool(host), query, params)
+                for host, (query, params) in queries.items()
+            }
+            frames = {}
+            for host, future in futures.items():
+                try:
+                    frames[host] = future.result()
+                except Exception as e:
+                    self.stats.record_failure(queries[host][0], e)
+                    raise
+            return frames
+
+# Rollup totals (event_table, city, label, total), None if not in use / not built yet
+    def _rollup_totals(self, ttl=None):
+        if not self.use_rollups:
+            return None
+        try:
+            totals = self.cache.get_or_fetch(ROLLUP_TOTALS_QUERY, lambda: self._read(ROLLUP_TOTALS_QUERY), ttl=ttl)
+        except Exception:
+            return None
+
+        totals["city"] = totals["city"].mask(totals["city"] == "")
+        totals["total"] = totals["total"].astype("int64")
+        return totals
+
 # Database Access Layer
     def get_city_summary(self):
-        accidents = self.fetch_dataframe(
-            "SELECT city, COUNT(*) total FROM accident_events GROUP BY city"
-        )
-        complaints = self.fetch_dataframe(
-            "SELECT city, COUNT(*) total FROM nlp_complaints GROUP BY city"
-        )
-        crowd = self.fetch_dataframe(
-            "SELECT city, COUNT(*) total FROM crowd_events WHERE severity='Overcrowded' GROUP BY city"
-        )
-        return {
-            "accidents": accidents,
-            "complaints": complaints,
-            "crowd": crowd
-        }
+        totals = self._rollup_totals()
+        if totals is not None:
+            return {
+                "accidents": city_totals(totals, "accident_events"),
+                "complaints": city_totals(totals, "nlp_complaints"),
+                "crowd": city_totals(totals, "crowd_events", label="Overcrowded")
+            }
+
+        return {name: self.fetch_dataframe(query) for name, query in CITY_SUMMARY_QUERIES.items()}
+
+# Dashboard KPI strip + city charts from a single combined query
+    def get_kpi_snapshot(self, ttl=None):
+        totals = self._rollup_totals(ttl)
+        if totals is not None:
+            return KpiSnapshot.from_rows(pd.DataFrame(kpi_rows(totals), columns=["metric", "city", "total"]))
+        return KpiSnapshot.from_rows(self.fetch_dataframe(KPI_SNAPSHOT_QUERY, ttl=ttl))
 
@@ -0,0 +1,138 @@
+import os
+import re
+import sqlite3
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# 🪶 Embedded SQLite backend (DB_BACKEND=sqlite)
+# Same six event tables + event_rollups in one local file, in WAL mode so the
+# dashboard can read while the event writer inserts. Used for offline load tests,
+# benchmarks and single-node deployments without RDS.
+# Connections look enough like pymysql's for the app code: %s placeholders
+# (and %% escapes) are translated, begin()/ping() exist, and autocommit is on.
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "urbanbot.db")
+BUSY_TIMEOUT = 5                # seconds a writer waits for the WAL lock
+
+NOW = "(datetime('now'))"                # UTC, like the MySQL sessions
+
+SQLITE_DDL = f"""
+CREATE TABLE IF NOT EXISTS accident_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    city TEXT, area TEXT, latitude REAL, longitude REAL,
+    severity TEXT, confidence_score REAL, image_name TEXT,
+    event_time TEXT NOT NULL DEFAULT {NOW}
+);
+CREATE TABLE IF NOT EXISTS road_damage_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    city TEXT, area TEXT, latitude REAL, longitude REAL,
+    damage_count INTEGER, damage_types TEXT, severity TEXT, image_name TEXT,
+    event_time TEXT NOT NULL DEFAULT {NOW}
+);
+CREATE TABLE IF NOT EXISTS crowd_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    city TEXT, area TEXT, latitude REAL, longitude REAL,
+    camera_id TEXT, crowd_count INTEGER, severity TEXT, image_name TEXT,
+    event_time TEXT NOT NULL DEFAULT {NOW}
+);
+CREATE TABLE IF NOT EXISTS traffic_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    city TEXT, area TEXT, latitude REAL, longitude REAL,
+    predicted_traffic REAL, congestion_level TEXT, model_used TEXT,
+    event_time TEXT NOT NULL DEFAULT {NOW}
+);
+CREATE TABLE IF NOT EXISTS air_quality_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    city TEXT, monitoring_station TEXT, latitude REAL, longitude REAL,
+    aqi REAL, aqi_category TEXT,
+    timestamp TEXT NOT NULL DEFAULT {NOW}
+);
+CREATE TABLE IF NOT EXISTS nlp_complaints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_key TEXT UNIQUE,
+    city TEXT, category TEXT, department TEXT, complaint_text TEXT,
+    sentiment TEXT, priority TEXT,
+    created_at TEXT DEFAULT {NOW}
+);
+CREATE TABLE IF NOT EXISTS event_rollups (
+    event_table TEXT NOT NULL,
+    city TEXT NOT NULL,
+    label TEXT NOT NULL,
+    hour TEXT NOT NULL,
+    events INTEGER NOT NULL,
+    PRIMARY KEY (event_table, city, label, hour)
+);
+"""
+
+_PLACEHOLDER_RE = re.compile(r"%(s|%)")
+
+
+# pymysql-style "%s" / "%%" → sqlite "?" / "%" (only when params are passed, like pymysql)
+def translate(query):
+    return _PLACEHOLDER_RE.sub(lambda m: "?" if m.group(1) == "s" else "%", query)
+
+
+class SqliteCursor(sqlite3.Cursor):
+
+    def execute(self, query, params=None):
+        if params is None:
+            return super().execute(query)
+        return super().execute(translate(query), params)
+
+    def executemany(self, query, seq_of_params):
+        return super().executemany(translate(query), seq_of_params)
+
+
+class SqliteConnection(sqlite3.Connection):
+
+    def cursor(self, factory=SqliteCursor):
+        return super().cursor(factory)
+
+    def begin(self):
+        self.execute("BEGIN")
+
+    def ping(self, reconnect=False):
+        self.execute("SELECT 1")
+
+    # the pool closes a connection that raised mid-transaction; roll back first, or its
+    # still-referenced statements keep the write lock until they are garbage collected
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+        super().close()
+
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+# tables + the same indexes as chatbot/schema.py, once per file and process
+def _init_schema(conn, path):
+    from chatbot.schema import event_indexes
+
+    with _init_lock:
+        if path in _initialized:
+            return
+        conn.executescript(SQLITE_DDL)
+        for table, name, columns in event_indexes():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+        _initialized.add(path)
+
+
+def connect(path=None):
+    path = path or SQLITE_PATH
+    conn = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT,
+        isolation_level=None,               # autocommit, explicit begin() like the MySQL code
+        check_same_thread=False,            # pooled: used by one thread at a time, not always the creator
+        factory=SqliteConnection
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    _init_schema(conn, path)
+    return conn
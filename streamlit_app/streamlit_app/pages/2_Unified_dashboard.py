@@ -1,7 +1,9 @@
 import streamlit as st
-import pymysql
-import os
+import altair as alt
 from dotenv import load_dotenv
+from chatbot.event_browser import EventBrowser
+from chatbot.query_stats import get_query_stats
+from chatbot.sql_agent import HOTSPOTS_QUERY, SQLAgent
 import pandas as pd
 
 load_dotenv()
@@ -35,32 +37,14 @@ st.markdown("""
 st.title("🏙️ Unified Smart City Command Center")
 st.caption("AI-driven Real-Time Urban Intelligence Dashboard")
 
-# ================= DB CONNECTION =================
-def get_connection():
-    return pymysql.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME"),
-        port=3306
-    )
+# ================= DB QUERIES (pooled + cached + timed) =================
+KPI_TTL = 30          # seconds; counters and city charts
+
+agent = SQLAgent()
 
-def fetch_query(query):
-    try:
-        conn = get_connection()
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
-    except:
-        return pd.DataFrame()
-
-# ================= KPI QUERIES =================
-accidents = fetch_query("SELECT COUNT(*) total FROM accident_events")
-road = fetch_query("SELECT COUNT(*) total FROM road_damage_events")
-crowd = fetch_query("SELECT COUNT(*) total FROM crowd_events WHERE severity='Overcrowded'")
-traffic = fetch_query("SELECT COUNT(*) total FROM traffic_events WHERE congestion_level='High'")
-aqi = fetch_query("SELECT COUNT(*) total FROM air_quality_events WHERE aqi_category IN ('Poor','Severe')")
-complaints = fetch_query("SELECT COUNT(*) total FROM nlp_complaints WHERE priority='HIGH'")
+# ================= KPI SNAPSHOT =================
+# six counters + both city breakdowns in one round trip
+kpi = agent.get_kpi_snapshot(ttl=KPI_TTL)
 
 # ================= KPI DISPLAY =================
 c1, c2, c3, c4, c5, c6 = st.columns(6)
@@ -73,12 +57,12 @@ def show_kpi(col, title, value):
     </div>
     """, unsafe_allow_html=True)
 
-show_kpi(c1, "🚑 Accidents", accidents.iloc[0,0] if not accidents.empty else 0)
-show_kpi(c2, "🛣 Road Issues", road.iloc[0,0] if not road.empty else 0)
-show_kpi(c3, "👥 Overcrowding", crowd.iloc[0,0] if not crowd.empty else 0)
-show_kpi(c4, "🚦 High Traffic", traffic.iloc[0,0] if not traffic.empty else 0)
-show_kpi(c5, "🌫 AQI Alerts", aqi.iloc[0,0] if not aqi.empty else 0)
-show_kpi(c6, "🗣 High Complaints", complaints.iloc[0,0] if not complaints.empty else 0)
+show_kpi(c1, "🚑 Accidents", kpi.accidents)
+show_kpi(c2, "🛣 Road Issues", kpi.road_issues)
+show_kpi(c3, "👥 Overcrowding", kpi.overcrowding)
+show_kpi(c4, "🚦 High Traffic", kpi.high_traffic)
+show_kpi(c5, "🌫 AQI Alerts", kpi.aqi_alerts)
+show_kpi(c6, "🗣 High Complaints", kpi.high_complaints)
 
 st.divider()
 
@@ -89,25 +73,25 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("### 👥 Overcrowding Events by City")
-    crowd_chart = fetch_query("""
-        SELECT city, COUNT(*) total
-        FROM crowd_events
-        WHERE severity='Overcrowded'
-        GROUP BY city
-    """)
-    if not crowd_chart.empty:
-        st.bar_chart(crowd_chart.set_index("city"))
+    if not kpi.overcrowding_by_city.empty:
+        st.bar_chart(kpi.overcrowding_by_city.set_index("city"))
 
 with col2:
     st.markdown("### 🗣 High Priority Complaints by City")
-    complaint_chart = fetch_query("""
-        SELECT city, COUNT(*) total
-        FROM nlp_complaints
-        WHERE priority='HIGH'
-        GROUP BY city
-    """)
-    if not complaint_chart.empty:
-        st.bar_chart(complaint_chart.set_index("city"))
+    if not kpi.complaints_by_city.empty:
+        st.bar_chart(kpi.complaints_by_city.set_index("city"))
+
+# ================= COMPLAINT HOTSPOTS =================
+# complaint_hotspots is the small grid table built by nlp_complaints.py --hotspots
+st.markdown("### 📍 High Priority Complaint Hotspots")
+hotspots = agent.fetch_dataframe(HOTSPOTS_QUERY, ttl=KPI_TTL)
+
+if not hotspots.empty:
+    map_col, table_col = st.columns([2, 1])
+    with map_col:
+        st.map(hotspots, latitude="cell_lat", longitude="cell_lon")
+    with table_col:
+        st.dataframe(hotspots.head(10), use_container_width=True)
 
 
 
@@ -117,47 +101,33 @@ st.divider()
 
 st.subheader("📌 Latest Critical Events")
 
-latest_accidents = fetch_query("""
-SELECT city, area, severity, event_time
-FROM accident_events
-ORDER BY event_time DESC
-LIMIT 5
-""")
-
-latest_road = fetch_query("""
-SELECT city, area, severity, event_time
-FROM road_damage_events
-ORDER BY event_time DESC
-LIMIT 5
-""")
-
-latest_complaints = fetch_query("""
-SELECT city, category, priority, created_at
-FROM nlp_complaints
-ORDER BY created_at DESC
-LIMIT 5
-""")
-
-latest_crowd = fetch_query("""
-SELECT city, severity, crowd_count, event_time
-FROM crowd_events
-ORDER BY event_time DESC
-LIMIT 5
-""")
-
-latest_traffic = fetch_query("""
-SELECT city, congestion_level, predicted_traffic, event_time
-FROM traffic_events
-ORDER BY event_time DESC
-LIMIT 5
-""")
-
-latest_aqi = fetch_query("""
-SELECT city, aqi, aqi_category, timestamp
-FROM air_quality_events
-ORDER BY timestamp DESC
-LIMIT 5
-""")
+# Loaded once per session, then each rerun only fetches rows newer than the
+# panel's cursor (all six tables in parallel)
+PANEL_TABLES = {
+    "accidents": "accident_events",
+    "road": "road_damage_events",
+    "crowd": "crowd_events",
+    "traffic": "traffic_events",
+    "aqi": "air_quality_events",
+    "complaints": "nlp_complaints"
+}
+
+if "latest_panels" not in st.session_state:
+    st.session_state.latest_panels = {name: (table, None, None, None) for name, table in PANEL_TABLES.items()}
+
+st.session_state.latest_panels = EventBrowser(agent).refresh_latest(st.session_state.latest_panels, n=5)
+latest = {
+    name: rows.drop(columns="id") if rows is not None else pd.DataFrame()
+    for name, (_, rows, _, _) in st.session_state.latest_panels.items()
+}
+
+
+# a failed read shows as an error (with the last rows seen, if any), not as "no events"
+def show_panel(name):
+    error = st.session_state.latest_panels[name][3]
+    if error:
+        st.error(f"⚠️ Couldn't load the latest events: {error}")
+    st.dataframe(latest[name], use_container_width=True)
 
 
 row1_col1, row1_col2, row1_col3 = st.columns(3)
@@ -165,28 +135,48 @@ row2_col1, row2_col2, row2_col3 = st.columns(3)
 
 with row1_col1:
     st.markdown("### 🚑 Recent Accidents")
-    st.dataframe(latest_accidents, use_container_width=True)
+    show_panel("accidents")
 
 with row1_col2:
     st.markdown("### 🛣 Road Damage")
-    st.dataframe(latest_road, use_container_width=True)
+    show_panel("road")
 
 with row1_col3:
     st.markdown("### 👥 Crowd Alerts")
-    st.dataframe(latest_crowd, use_container_width=True)
+    show_panel("crowd")
 
 with row2_col1:
     st.markdown("### 🚦 Traffic Alerts")
-    st.dataframe(latest_traffic, use_container_width=True)
+    show_panel("traffic")
 
 with row2_col2:
     st.markdown("### 🌫 AQI Alerts")
-    st.dataframe(latest_aqi, use_container_width=True)
+    show_panel("aqi")
 
 with row2_col3:
     st.markdown("### 🗣 Recent Complaints")
-    st.dataframe(latest_complaints, use_container_width=True)
+    show_panel("complaints")
 
 st.success("✅ Unified Smart City Command Center Operational")
 
+# ================= QUERY PERFORMANCE =================
+# per-query latency since this server process started (cache hits not counted)
+with st.expander("🩺 Query Performance"):
+    query_stats = get_query_stats()
+    st.dataframe(query_stats.summary(), use_container_width=True)
+
+    # keep the buckets in latency order (a plain bar chart sorts the labels as strings)
+    st.altair_chart(
+        alt.Chart(query_stats.histogram()).mark_bar().encode(
+            x=alt.X("bucket", sort=None, title="latency"),
+            y=alt.Y("queries", title="queries")
+        ),
+        use_container_width=True
+    )
+
+    failures = query_stats.recent_failures()
+    if not failures.empty:
+        st.error(f"{len(failures)} recent failed read(s): the panels above may be empty because of them")
+        st.dataframe(failures, use_container_width=True)
+
 
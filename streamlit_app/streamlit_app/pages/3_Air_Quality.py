@@ -1,11 +1,11 @@
 import streamlit as st
 import pandas as pd
-import pymysql
 import pickle
 import smtplib
 import os
 from datetime import datetime
 from dotenv import load_dotenv
+from chatbot.event_writer import get_event_writer
 from email.message import EmailMessage
 
 # ================= LOAD ENV =================
@@ -43,16 +43,6 @@ AQI_STATIONS = {
 }
 
 
-# ================= DB CONNECTION =================
-def get_connection():
-    return pymysql.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME"),
-        port=3306
-    )
-
 # ================= EMAIL ALERT =================
 def send_email_alert(subject, body):
     try:
@@ -158,28 +148,16 @@ with right:
         
         # ================= SAVE TO DB =================
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            cursor.execute("""
-            INSERT INTO air_quality_events
-            (city, monitoring_station, latitude, longitude, aqi, aqi_category)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (
-            city,
-            station,
-            latitude,
-            longitude,
-            predicted_aqi,
-            category
-        ))
-
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-
-            st.success("✅ AQI data saved to database")
+            get_event_writer().write("air_quality_events", {
+                "city": city,
+                "monitoring_station": station,
+                "latitude": latitude,
+                "longitude": longitude,
+                "aqi": predicted_aqi,
+                "aqi_category": category
+            })
+
+            st.success("✅ AQI data queued for database")
 
         except Exception as e:
             st.error(f"❌ DB error: {e}")
@@ -4,8 +4,8 @@ import os
 import numpy as np
 from ultralytics import YOLO
 from dotenv import load_dotenv
+from chatbot.event_writer import get_event_writer
 from datetime import datetime
-import pymysql
 import smtplib
 from email.message import EmailMessage
 
@@ -21,16 +21,6 @@ CONF_THRESHOLD = 0.25
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# ================= DB CONNECTION =================
-def get_connection():
-    return pymysql.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME"),
-        port=3306
-    )
-
 # ================= EMAIL ALERT =================
 def send_email_alert(subject, body):
     try:
@@ -166,28 +156,17 @@ with col2:
 
         # ================= DB INSERT =================
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                INSERT INTO accident_events
-                (city, area, latitude, longitude, severity, confidence_score, image_name)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                city,
-                area,
-                latitude,
-                longitude,
-                severity,
-                avg_conf,
-                os.path.basename(image_path)
-            ))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-
-            st.success("✅ Accident data saved to MYSQL")
+            get_event_writer().write("accident_events", {
+                "city": city,
+                "area": area,
+                "latitude": latitude,
+                "longitude": longitude,
+                "severity": severity,
+                "confidence_score": avg_conf,
+                "image_name": os.path.basename(image_path)
+            })
+
+            st.success("✅ Accident data queued for MYSQL")
 
         except Exception as e:
             st.error(f"❌ DB error: {e}")
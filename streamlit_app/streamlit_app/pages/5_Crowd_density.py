@@ -1,7 +1,6 @@
 import streamlit as st 
 import pandas as pd 
 import numpy as np
-import pymysql 
 import smtplib
 import cv2
 import os
@@ -12,6 +11,7 @@ tf.keras.backend.clear_session()
 from tensorflow.keras.models import load_model
 from datetime import datetime 
 from dotenv import load_dotenv
+from chatbot.event_writer import get_event_writer
 from email.message import EmailMessage
 
 
@@ -27,16 +27,6 @@ img_size = (224, 224)
 os.makedirs(upload_dir, exist_ok=True)
 
 
-# DB Connection
-def get_connection():
-    return pymysql.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME"),
-        port=3306
-    )
-
 # Email function
 def send_email_alert(subject, body):
     try:
@@ -175,30 +165,18 @@ with right:
 
         # ================= SAVE TO DB =================
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                INSERT INTO crowd_events
-                (city, area, latitude, longitude, camera_id,
-                 crowd_count, severity, image_name)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                city,
-                area,
-                latitude,
-                longitude,
-                camera_id,
-                crowd_count,
-                severity,
-                os.path.basename(image_path)
-            ))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-
-            st.success("✅ Crowd data saved to MYSQL")
+            get_event_writer().write("crowd_events", {
+                "city": city,
+                "area": area,
+                "latitude": latitude,
+                "longitude": longitude,
+                "camera_id": camera_id,
+                "crowd_count": crowd_count,
+                "severity": severity,
+                "image_name": os.path.basename(image_path)
+            })
+
+            st.success("✅ Crowd data queued for MYSQL")
 
         except Exception as e:
             st.error(f"❌ DB error: {e}")
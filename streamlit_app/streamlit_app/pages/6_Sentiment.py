@@ -1,23 +1,13 @@
 import streamlit as st
-from nltk.sentiment import SentimentIntensityAnalyzer
-import pymysql
-import os
-import nltk
 from dotenv import load_dotenv
+from chatbot.db_pool import get_router
+from chatbot.query_cache import invalidate
+from chatbot.rollups import record_event
+from chatbot.sentiment import score_text
 
 load_dotenv()
 
 
-def get_connection():
-    return pymysql.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME"),
-        port=3306
-    )
-
-
 st.set_page_config(
     page_title="Citizen Complaint AI",
     layout="centered"
@@ -26,36 +16,32 @@ st.set_page_config(
 st.title("🧠 Citizen Complaint AI")
 st.caption("Automated sentiment analysis & priority routing for smart cities")
 
-sia = SentimentIntensityAnalyzer()
-
 
 
 # ---------------- SENTIMENT LOGIC ----------------
+# VADER via the shared scorer (same labels as the batch job, analyzer built once)
 def analyze_sentiment(text):
-    score = sia.polarity_scores(text)["compound"]
-
-    if score >= 0.05:
-        return "POSITIVE", "LOW"
-    elif score <= -0.05:
-        return "NEGATIVE", "HIGH"
-    else:
-        return "NEUTRAL", "MEDIUM"
+    return score_text(text, backend="vader")
 
 # ---------------- DB INSERT ----------------
 def insert_complaint(city, category, department, text, sentiment, priority):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    query = """
-        INSERT INTO nlp_complaints
-        (city, category, department, complaint_text, sentiment, priority)
-        VALUES (%s, %s, %s, %s, %s, %s)
-    """
-
-    cursor.execute(query, (city, category, department, text, sentiment, priority))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    # primary, or the city's shard
+    with get_router().write_pool(city).connection() as conn:
+        cursor = conn.cursor()
+        conn.begin()
+
+        query = """
+            INSERT INTO nlp_complaints
+            (city, category, department, complaint_text, sentiment, priority)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """
+
+        cursor.execute(query, (city, category, department, text, sentiment, priority))
+        record_event(cursor, "nlp_complaints", city, priority)
+        conn.commit()
+        cursor.close()
+    invalidate("nlp_complaints")
+    invalidate("event_rollups")
 
 # ---------------- UI ----------------
 st.subheader("📌 Register Complaint")
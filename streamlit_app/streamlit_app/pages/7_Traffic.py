@@ -4,7 +4,7 @@ import os
 from tensorflow.keras.models import load_model
 from datetime import datetime
 from dotenv import load_dotenv
-import pymysql
+from chatbot.event_writer import get_event_writer
 import smtplib
 from email.message import EmailMessage
 
@@ -14,16 +14,6 @@ load_dotenv()
 # ================= CONFIG =================
 MODEL_PATH = "models/traffic_lstm_model.h5"
 
-# ================= DB CONNECTION =================
-def get_connection():
-    return pymysql.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME"),
-        port=3306
-    )
-
 # ================= EMAIL ALERT =================
 def send_email_alert(subject, body):
     try:
@@ -155,29 +145,17 @@ with right:
 
         # ================= SAVE TO DB =================
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                INSERT INTO traffic_events
-                (city, area, latitude, longitude,
-                 predicted_traffic, congestion_level, model_used)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                city,
-                area,
-                latitude,
-                longitude,
-                predicted_traffic,
-                congestion,
-                "LSTM"
-            ))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-
-            st.success("✅ Traffic prediction saved to database")
+            get_event_writer().write("traffic_events", {
+                "city": city,
+                "area": area,
+                "latitude": latitude,
+                "longitude": longitude,
+                "predicted_traffic": predicted_traffic,
+                "congestion_level": congestion,
+                "model_used": "LSTM"
+            })
+
+            st.success("✅ Traffic prediction queued for database")
 
         except Exception as e:
             st.error(f"❌ DB error: {e}")
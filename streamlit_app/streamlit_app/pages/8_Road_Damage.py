@@ -2,9 +2,9 @@ import streamlit as st
 import cv2
 import numpy as np
 import os
-import pymysql
 from ultralytics import YOLO
 from dotenv import load_dotenv
+from chatbot.event_writer import get_event_writer
 from datetime import datetime
 
 
@@ -19,15 +19,6 @@ CONF_THRESHOLD = 0.25
 # ========================================
 
 
-# DB connection
-def get_connection():
-    return pymysql.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME"),
-        port=3306
-    )
     
 
 # Create upload folder if it does not exist
@@ -165,29 +156,18 @@ with right:
 
         # 8️⃣ SAVE TO DATABASE (LAST STEP)
         try:
-            conn = get_connection()
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                INSERT INTO road_damage_events
-                (city, area, latitude, longitude, damage_count, damage_types, severity, image_name)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                city,
-                area,
-                latitude,
-                longitude,
-                damage_count,
-                ", ".join(unique_damages),
-                severity,
-                os.path.basename(image_path)
-            ))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-
-            st.success("✅ Data stored in database")
+            get_event_writer().write("road_damage_events", {
+                "city": city,
+                "area": area,
+                "latitude": latitude,
+                "longitude": longitude,
+                "damage_count": damage_count,
+                "damage_types": ", ".join(unique_damages),
+                "severity": severity,
+                "image_name": os.path.basename(image_path)
+            })
+
+            st.success("✅ Data queued for database")
 
         except Exception as e:
             st.error(f"❌ Database error: {e}")
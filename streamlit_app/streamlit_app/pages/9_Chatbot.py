@@ -1,5 +1,5 @@
 import streamlit as st
-from chatbot.chatbot_logic import chatbot_answer
+from chatbot.chatbot_logic import chatbot_answer_stream
 
 st.title("🤖 UrbanBot AI Assistant")
 st.caption("AI-powered Smart City Decision Support System")
@@ -9,13 +9,22 @@ if "chat_history" not in st.session_state:
 
 user_input = st.text_input("Ask UrbanBot a question")
 
-if st.button("Send") and user_input:
-    response = chatbot_answer(user_input)
-    st.session_state.chat_history.append(("You", user_input))
-    st.session_state.chat_history.append(("UrbanBot", response))
-
 for role, msg in st.session_state.chat_history:
     if role == "You":
         st.markdown(f"**🧑 {msg}**")
     else:
         st.markdown(f"**🤖 {msg}**")
+
+if st.button("Send") and user_input:
+    st.markdown(f"**🧑 {user_input}**")
+
+    # render the answer as it streams in, then keep it in the history
+    placeholder = st.empty()
+    response = ""
+    for chunk in chatbot_answer_stream(user_input):
+        response += chunk
+        placeholder.markdown(f"**🤖 {response}▌**")
+    placeholder.markdown(f"**🤖 {response}**")
+
+    st.session_state.chat_history.append(("You", user_input))
+    st.session_state.chat_history.append(("UrbanBot", response))
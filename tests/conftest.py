@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+
+import pymysql
+import pytest
+
+# repo root (batch job modules) + streamlit_app (the chatbot package, imported as chatbot.*)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "streamlit_app"))
+
+# chatbot.* reads its settings at import: local SQLite files, nothing written to the cwd
+TMP_DIR = tempfile.mkdtemp(prefix="urbanbot-tests-")
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(TMP_DIR, "primary.db")
+os.environ["DB_READ_HOSTS"] = ""
+os.environ["DB_SHARDS"] = ""
+os.environ["SLOW_QUERY_LOG"] = ""
+os.environ["EVENT_WRITE_BEHIND"] = "0"
+os.environ["EVENT_SPILL_PATH"] = os.path.join(TMP_DIR, "event_spill.jsonl")
+os.environ["EVENT_DEAD_LETTER_PATH"] = os.path.join(TMP_DIR, "event_dead_letter.jsonl")
+os.environ["ARCHIVE_DIR"] = os.path.join(TMP_DIR, "archive")
+
+
+# shared DB helpers, as fixtures: first value of a query, inserting accident rows,
+# and taking a pool's database "down" (idle connections dropped, new ones refused)
+@pytest.fixture
+def count():
+    def count(pool, query):
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            value = cursor.fetchone()[0]
+            cursor.close()
+        return value
+    return count
+
+
+@pytest.fixture
+def insert_accidents():
+    def insert_accidents(pool, rows):
+        with pool.connection() as conn:
+            conn.executemany(
+                "INSERT INTO accident_events (city, area, severity, event_time) VALUES (?, ?, ?, ?)", rows
+            )
+    return insert_accidents
+
+
+def down():
+    raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+
+
+# returns the pool's connect function, to bring it back up
+@pytest.fixture
+def take_down():
+    def take_down(pool):
+        connect = pool._connect
+        pool.close()
+        pool._connect = down
+        return connect
+    return take_down
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nlp_complaints import clean_text, clean_text_series
+
+
+EDGE_CASES = [
+    None,
+    np.nan,
+    float("nan"),
+    "",
+    "   ",
+    "Request for Pothole Repair",
+    "PRINTED - Street Light OUTAGE",
+    "MiXeD CaSe TeXt",
+    "See http://www.boston.gov/311?id=42 for details!!",
+    "https://example.com",
+    "linkhttp://glued.to/word after",
+    "Case Closed. Case Resolved. Completed 3/12/2021 10:41 AM",
+    "duplicate of #101004421",
+    "12345",
+    "!!!",
+    "?!.,;:-_/\\()[]{}",
+    "\tcrew   dispatched\n\n",
+    "Café noise complaint",
+    "naïve façade – 150W HPS",
+    "ÉCOLE ÜBER straße",
+    "日本語のテキスト",
+    "emoji 🚧 road 🚦 work",
+    "N/A",
+    "nan",
+]
+
+
+def test_clean_text_series_matches_clean_text():
+    texts = pd.Series(EDGE_CASES, dtype=object)
+
+    expected = [clean_text(text) for text in texts]
+    actual = clean_text_series(texts)
+
+    assert list(actual.index) == list(texts.index)
+    for text, want, got in zip(EDGE_CASES, expected, actual):
+        assert got == want, f"{text!r}: {got!r} != {want!r}"
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_single_value(text):
+    assert clean_text_series(pd.Series([text], dtype=object)).iloc[0] == clean_text(text)
+
+
+def test_keeps_index():
+    texts = pd.Series(["B", None, "a!"], index=[10, 3, 7], dtype=object)
+    assert clean_text_series(texts).to_dict() == {10: clean_text("B"), 3: clean_text(None), 7: clean_text("a!")}
@@ -0,0 +1,113 @@
+from functools import partial
+
+import pymysql
+import pytest
+
+from chatbot import db_pool
+from chatbot.db_pool import ConnectionPool, Router, get_pool
+from chatbot.event_browser import EventBrowser
+from chatbot.query_stats import QueryStats
+from chatbot.sql_agent import SQLAgent
+
+
+@pytest.fixture
+def pool(tmp_path, insert_accidents):
+    pool = ConnectionPool(connect=partial(db_pool.connect, str(tmp_path / "events.db")))
+    insert_accidents(pool, [("Chennai", f"area {i}", "High", f"2024-01-01 10:{i // 2:02d}:00") for i in range(25)])
+    return pool
+
+
+@pytest.fixture
+def browser(pool):
+    return EventBrowser(SQLAgent(pool=pool, stats=QueryStats(slow_log="")))
+
+
+def test_keyset_pages_cover_every_row_once(browser):
+    ids, cursor = [], None
+    while True:
+        rows, cursor = browser.page("accident_events", cursor=cursor, limit=10)
+        ids += rows["id"].tolist()
+        if cursor is None:
+            break
+    assert sorted(ids) == list(range(1, 26))
+    assert len(ids) == len(set(ids))
+
+
+def test_undated_complaints_are_paged_last(browser, pool):
+    with pool.connection() as conn:
+        conn.executemany(
+            "INSERT INTO nlp_complaints (city, category, priority, created_at) VALUES (?, ?, ?, ?)",
+            [("Boston", "Pothole", "HIGH", None if i % 2 else f"2021-01-0{i + 1} 10:00:00") for i in range(6)]
+        )
+
+    ids, cursors, cursor = [], [], None
+    while True:
+        rows, cursor = browser.page("nlp_complaints", cursor=cursor, limit=2)
+        ids += rows["id"].tolist()
+        cursors.append(cursor)
+        if cursor is None:
+            break
+
+    assert ids == [5, 3, 1, 6, 4, 2]
+    assert cursors[1] == (None, 6)
+
+
+def test_failed_page_raises_instead_of_ending(browser, pool, take_down):
+    take_down(pool)
+    with pytest.raises(pymysql.err.OperationalError):
+        browser.page("accident_events")
+    with pytest.raises(pymysql.err.OperationalError):
+        browser.changes_since("accident_events", ("2024-01-01 00:00:00", 0))
+
+
+def test_refresh_latest_keeps_rows_and_reports_error(browser, pool, insert_accidents, take_down):
+    panels = browser.refresh_latest({"accidents": ("accident_events", None, None, None)}, n=5)
+    table, rows, cursor, error = panels["accidents"]
+    assert len(rows) == 5 and error is None
+
+    insert_accidents(pool, [("Delhi", "new", "High", "2024-01-02 09:00:00")] * 2)
+    panels = browser.refresh_latest(panels, n=5)
+    assert panels["accidents"][1]["city"].tolist()[:2] == ["Delhi", "Delhi"]
+
+    take_down(pool)
+    failed = browser.refresh_latest(panels, n=5)
+    table, rows, cursor, error = failed["accidents"]
+    assert "Can't connect" in error
+    assert rows is panels["accidents"][1] and cursor == panels["accidents"][2]
+
+
+# two SQLite files as city shards: ids 1..n on both, interleaved event times
+@pytest.fixture
+def sharded_browser(tmp_path, insert_accidents):
+    chennai, delhi = str(tmp_path / "chennai.db"), str(tmp_path / "delhi.db")
+    for host, city, minute in [(chennai, "Chennai", 0), (delhi, "Delhi", 1)]:
+        insert_accidents(get_pool(host), [(city, f"area {i}", "High", f"2024-01-01 10:{2 * i + minute:02d}:00") for i in range(7)])
+    router = Router(primary=chennai, read_hosts=[], shards={"Delhi": delhi})
+    return EventBrowser(SQLAgent(router=router, stats=QueryStats(slow_log=""))), delhi
+
+
+def test_sharded_pages_cover_every_row_once(sharded_browser):
+    browser, _ = sharded_browser
+    seen, cursor = [], None
+    while True:
+        rows, cursor = browser.page("accident_events", cursor=cursor, limit=4)
+        seen += list(zip(rows["event_time"], rows["city"], rows["id"]))
+        if cursor is None:
+            break
+
+    # newest first across both shards, every (shard, id) exactly once
+    assert [t for t, _, _ in seen] == [f"2024-01-01 10:{m:02d}:00" for m in range(13, -1, -1)]
+    assert len({(city, i) for _, city, i in seen}) == 14
+
+def test_sharded_changes_keep_a_cursor_per_shard(sharded_browser, insert_accidents):
+    browser, delhi = sharded_browser
+    rows, cursor = browser.changes_since("accident_events", None)
+    assert len(rows) == 14
+
+    # Delhi's new row has id 8; Chennai's cursor (id 7) must not skip or repeat anything
+    insert_accidents(get_pool(delhi), [("Delhi", "new", "High", "2024-01-02 09:00:00")])
+    rows, cursor = browser.changes_since("accident_events", cursor)
+    assert rows["area"].tolist() == ["new"]
+
+    rows, _ = browser.changes_since("accident_events", cursor)
+    assert rows.empty
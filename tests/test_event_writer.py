@@ -0,0 +1,139 @@
+import json
+import sqlite3
+from datetime import datetime
+from functools import partial
+
+import pymysql
+import pytest
+
+from chatbot import db_pool
+from chatbot.db_pool import ConnectionPool
+from chatbot.event_writer import EventWriter, is_connection_error
+from chatbot.rollups import record_events
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(connect=partial(db_pool.connect, str(tmp_path / "events.db")))
+    # a row the DB rejects: severity 'BAD' fails a trigger, like a constraint would
+    with pool.connection() as conn:
+        conn.execute("""
+            CREATE TRIGGER reject_bad BEFORE INSERT ON accident_events WHEN NEW.severity = 'BAD'
+            BEGIN SELECT RAISE(ABORT, 'bad severity'); END
+        """)
+    return pool
+
+
+@pytest.fixture
+def writer(pool, tmp_path):
+    return EventWriter(
+        pool, write_behind=False,
+        spill_path=str(tmp_path / "spill.jsonl"), dead_letter_path=str(tmp_path / "dead.jsonl")
+    )
+
+
+def accident(severity="High", city="Chennai"):
+    return {"city": city, "area": "T Nagar", "latitude": 13.0, "longitude": 80.2, "severity": severity,
+            "confidence_score": 0.9, "image_name": "a.jpg"}
+
+
+# the row write() would queue for these values
+def writer_row(values, event_time="2024-01-01 10:00:00"):
+    row = [values[c] for c in ["city", "area", "latitude", "longitude", "severity", "confidence_score", "image_name"]]
+    return row + [event_time]
+
+
+def test_rows_and_rollups_written(writer, pool, count):
+    writer.write("accident_events", accident())
+    writer.write("accident_events", accident())
+
+    assert count(pool, "SELECT COUNT(*) FROM accident_events") == 2
+    assert count(pool, "SELECT SUM(events) FROM event_rollups") == 2
+    assert writer.stats["written"] == 2
+
+
+def test_rejected_row_is_dead_lettered_not_retried(writer, pool, tmp_path, count):
+    writer._flush([
+        ("accident_events", writer_row(accident())),
+        ("accident_events", writer_row(accident("BAD"))),
+        ("accident_events", writer_row(accident()))
+    ])
+
+    assert count(pool, "SELECT COUNT(*) FROM accident_events") == 2
+    assert not writer.has_spill()
+    dead = [json.loads(line) for line in open(tmp_path / "dead.jsonl", encoding="utf-8")]
+    assert [d["row"][4] for d in dead] == ["BAD"]
+    assert "bad severity" in dead[0]["error"]
+
+    # later flushes don't see it again
+    writer.write("accident_events", accident())
+    assert count(pool, "SELECT COUNT(*) FROM accident_events") == 3
+    assert writer.stats["dead_letter"] == 1
+
+
+def test_unreachable_db_spills_then_replays(writer, pool, count, take_down):
+    connect = take_down(pool)
+    writer.write("accident_events", accident())
+    writer.write("accident_events", accident())
+    assert writer.has_spill()
+    assert writer.stats["written"] == 0
+
+    pool._connect = connect
+    writer.write("accident_events", accident())
+
+    assert count(pool, "SELECT COUNT(*) FROM accident_events") == 3
+    assert writer.stats["replayed"] == 2
+    assert not writer.has_spill()
+
+
+def test_bad_spilled_row_does_not_block_replay(writer, pool, count, take_down):
+    connect = take_down(pool)
+    writer.write("accident_events", accident("BAD"))
+    writer.write("accident_events", accident())
+
+    pool._connect = connect
+    writer.write("accident_events", accident())
+
+    assert count(pool, "SELECT COUNT(*) FROM accident_events") == 2
+    assert not writer.has_spill()
+    assert writer.stats["dead_letter"] == 1
+
+
+def test_only_connection_failures_are_retried():
+    assert is_connection_error(pymysql.err.OperationalError(2003, "Can't connect to MySQL server"))
+    assert is_connection_error(pymysql.err.OperationalError(1213, "Deadlock found"))
+    assert not is_connection_error(pymysql.err.OperationalError(1054, "Unknown column 'x'"))
+    assert is_connection_error(sqlite3.OperationalError("database is locked"))
+    assert not is_connection_error(sqlite3.OperationalError("no such table: accident_events"))
+    assert not is_connection_error(pymysql.err.IntegrityError(1062, "Duplicate entry"))
+
+
+def test_schema_error_is_dead_lettered_not_spilled(writer, pool):
+    with pool.connection() as conn:
+        conn.execute("DROP TABLE accident_events")
+
+    writer.write("accident_events", accident())
+    assert not writer.has_spill()
+    assert writer.stats["dead_letter"] == 1
+
+
+# records what record_events sends instead of running it
+class RecordingCursor:
+
+    def executemany(self, query, rows):
+        self.rows = rows
+
+
+def test_rollups_get_one_upsert_per_hour():
+    cursor = RecordingCursor()
+    record_events(cursor, "accident_events", [
+        ("Chennai", "High", "2024-01-01 10:00:05"),
+        ("Chennai", "High", "2024-01-01 10:59:59"),
+        ("Chennai", "High", datetime(2024, 1, 1, 10, 30)),
+        ("Chennai", "High", "2024-01-01 11:00:00")
+    ])
+
+    assert sorted(cursor.rows) == [
+        ("accident_events", "Chennai", "High", "2024-01-01 10:00:00", 3),
+        ("accident_events", "Chennai", "High", "2024-01-01 11:00:00", 1)
+    ]
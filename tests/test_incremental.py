@@ -0,0 +1,105 @@
+import json
+
+import pandas as pd
+import pytest
+
+import nlp_complaints
+from nlp_complaints import OUTPUT_PATH, WATERMARK_PATH, advance_watermark, load_output, new_rows, run_full, run_incremental
+
+
+def requests(rows):
+    return pd.DataFrame(
+        [{"case_title": title, "subject": "Public Works", "closure_reason": "", "open_dt": open_dt,
+          "department": "PWDx", "latitude": 42.3, "longitude": -71.06, "case_status": "Open",
+          "case_enquiry_id": key} for key, open_dt, title in rows]
+    )
+
+
+def test_ties_on_the_watermark_time_are_settled_by_case_id():
+    watermark = {"open_dt": "2021-01-02T10:00:00", "keys": ["A"]}
+    chunk = requests([
+        ("A", "2021-01-02 10:00:00", "seen at the watermark"),
+        ("B", "2021-01-02 10:00:00", "same time, not seen"),
+        ("C", "2021-01-02 11:00:00", "newer"),
+        ("D", "2021-01-01 09:00:00", "older")
+    ])
+    assert new_rows(chunk, watermark)["case_enquiry_id"].tolist() == ["B", "C"]
+
+    # another request at the same time joins the keys; a newer time replaces them
+    tied = advance_watermark(watermark, chunk[chunk["case_enquiry_id"] == "B"])
+    assert tied["open_dt"] == "2021-01-02T10:00:00" and tied["keys"] == ["A", "B"]
+    newer = advance_watermark(tied, chunk)
+    assert newer["open_dt"] == "2021-01-02T11:00:00" and newer["keys"] == ["C"]
+    assert advance_watermark(newer, chunk[chunk["case_enquiry_id"] == "D"]) == newer
+
+
+def test_undated_requests_are_picked_up_once():
+    chunk = requests([("U", "not a date", "undated"), ("A", "2021-01-02 10:00:00", "dated")])
+
+    watermark = advance_watermark(None, chunk)
+    assert watermark["undated"] == ["U"]
+    assert watermark["open_dt"] == "2021-01-02T10:00:00"
+
+    later = requests([("U", "not a date", "undated"), ("V", None, "new undated")])
+    assert new_rows(later, watermark)["case_enquiry_id"].tolist() == ["V"]
+    assert advance_watermark(watermark, later)["undated"] == ["U", "V"]
+
+    # undated ids are remembered even before any dated row
+    only_undated = advance_watermark(None, later)
+    assert only_undated["open_dt"] is None
+    assert new_rows(later, only_undated).empty
+
+
+class Interrupted(Exception):
+    pass
+
+
+# sink that stops the run after its first chunk
+class FailingSink:
+
+    def __init__(self):
+        self.chunks = 0
+
+    def load(self, df_nlp):
+        self.chunks += 1
+        if self.chunks == 2:
+            raise Interrupted()
+
+
+def output_ids():
+    return pd.read_csv(OUTPUT_PATH, dtype=str)["case_enquiry_id"].tolist()
+
+
+def test_interrupted_run_is_redone_without_duplicates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "311.csv"
+    requests([("A", "2021-01-01 10:00:00", "pothole"), ("B", "2021-01-01 11:00:00", "street light")]).to_csv(source, index=False)
+    run_incremental(str(source), chunk_size=1)
+    assert output_ids() == ["A", "B"]
+
+    requests([
+        ("A", "2021-01-01 10:00:00", "pothole"), ("B", "2021-01-01 11:00:00", "street light"),
+        ("C", "2021-01-02 10:00:00", "graffiti"), ("D", "2021-01-02 11:00:00", "missed trash"),
+        ("E", "bad date", "noise")
+    ]).to_csv(source, index=False)
+
+    with pytest.raises(Interrupted):
+        run_incremental(str(source), chunk_size=1, sinks=[FailingSink()])
+    assert output_ids() == ["A", "B"]
+    assert json.load(open(WATERMARK_PATH))["open_dt"] == "2021-01-01T11:00:00"
+
+    assert run_incremental(str(source), chunk_size=1) == 3
+    assert output_ids() == ["A", "B", "C", "D", "E"]
+    assert len(pd.read_csv(nlp_complaints.CLEANED_PATH)) == 5
+
+    assert run_incremental(str(source), chunk_size=1) == 0
+    assert output_ids() == ["A", "B", "C", "D", "E"]
+
+
+def test_full_parquet_run_keeps_numeric_case_ids_as_strings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "311.csv"
+    requests([("101003148712", "2021-01-01 10:00:00", "pothole"), ("101003148713", "bad date", "graffiti")]).to_csv(source, index=False)
+
+    run_full(str(source), fmt="parquet")
+    assert load_output(nlp_complaints.PARQUET_PATH)["case_enquiry_id"].tolist() == ["101003148712", "101003148713"]
@@ -0,0 +1,129 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from chatbot import llm_cache
+from chatbot.llm_cache import LLMCache, cache_key
+
+KEY = cache_key("llama-3.1-8b-instant", 0.2, "You are Urbanbot.", "How many accidents in Chennai?")
+
+
+# fake wall clock for the cache's expiry times
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(llm_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+class Generate:
+
+    def __init__(self, response="3 accidents today."):
+        self.response = response
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.response
+
+
+def test_key_changes_with_every_part():
+    parts = ["llama-3.1-8b-instant", 0.2, "You are Urbanbot.", "How many accidents in Chennai?"]
+    keys = {cache_key(*parts)}
+    for i, changed in enumerate(["other-model", 0.7, "Be brief.", "How many accidents in Delhi?"]):
+        keys.add(cache_key(*parts[:i], changed, *parts[i + 1:]))
+
+    assert len(keys) == 5
+    assert cache_key(*parts) == KEY
+
+
+def test_memory_hit_until_the_ttl_runs_out(clock):
+    cache, generate = LLMCache(ttl=60, cache_dir=""), Generate()
+
+    assert cache.get_or_generate(KEY, generate) == "3 accidents today."
+    clock.now += 59
+    assert cache.get_or_generate(KEY, generate) == "3 accidents today."
+    assert generate.calls == 1
+    assert cache.stats["hits"] == 1
+
+    clock.now += 2
+    cache.get_or_generate(KEY, generate)
+    assert generate.calls == 2
+
+
+def test_ttl_zero_turns_the_cache_off(clock):
+    cache, generate = LLMCache(ttl=0, cache_dir=""), Generate()
+
+    cache.get_or_generate(KEY, generate)
+    cache.get_or_generate(KEY, generate)
+
+    assert generate.calls == 2
+    assert cache.get(KEY) is None
+
+
+def test_least_recently_used_answer_is_evicted(clock):
+    cache = LLMCache(ttl=60, max_entries=2, cache_dir="")
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+    assert cache.stats["evictions"] == 1
+
+
+def test_disk_tier_survives_a_restart(clock, tmp_path):
+    LLMCache(ttl=60, cache_dir=str(tmp_path)).put(KEY, "3 accidents today.")
+
+    restarted, generate = LLMCache(ttl=60, cache_dir=str(tmp_path)), Generate("fresh")
+    assert restarted.get_or_generate(KEY, generate) == "3 accidents today."
+    assert generate.calls == 0
+    assert restarted.stats["disk_hits"] == 1
+
+    # promoted to the memory tier: the second read doesn't touch the disk
+    os.remove(tmp_path / (KEY + ".json"))
+    assert restarted.get(KEY) == "3 accidents today."
+    assert restarted.stats["hits"] == 1
+
+
+def test_disk_answer_keeps_its_original_expiry(clock, tmp_path):
+    LLMCache(ttl=60, cache_dir=str(tmp_path)).put(KEY, "3 accidents today.")
+    clock.now += 30
+
+    restarted = LLMCache(ttl=60, cache_dir=str(tmp_path))
+    assert restarted.get(KEY) == "3 accidents today."
+
+    clock.now += 31
+    assert restarted.get(KEY) is None
+
+
+def test_expired_disk_answer_is_removed(clock, tmp_path):
+    LLMCache(ttl=60, cache_dir=str(tmp_path)).put(KEY, "3 accidents today.")
+    clock.now += 61
+
+    restarted, generate = LLMCache(ttl=60, cache_dir=str(tmp_path)), Generate("fresh")
+    assert restarted.get_or_generate(KEY, generate) == "fresh"
+    assert generate.calls == 1
+
+    # the regenerated answer replaced the expired file
+    assert LLMCache(ttl=60, cache_dir=str(tmp_path)).get(KEY) == "fresh"
+
+
+def test_unreadable_disk_entry_is_a_miss(clock, tmp_path):
+    (tmp_path / (KEY + ".json")).write_text("{not json", encoding="utf-8")
+    cache = LLMCache(ttl=60, cache_dir=str(tmp_path))
+
+    assert cache.get(KEY) is None
+    assert cache.stats["misses"] == 1
+
+
+def test_clear_empties_both_tiers(clock, tmp_path):
+    cache = LLMCache(ttl=60, cache_dir=str(tmp_path))
+    cache.put(KEY, "3 accidents today.")
+    cache.clear()
+
+    assert cache.get(KEY) is None
+    assert not list(tmp_path.glob("*.json"))
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from chatbot.db_pool import get_pool
+from chatbot.sql_agent import SQLAgent
+from chatbot.query_stats import QueryStats
+from load_complaints import ComplaintLoader
+
+
+def output(priority="HIGH"):
+    return pd.DataFrame({
+        "case_enquiry_id": ["101", "102", "103", None],
+        "case_title": ["Pothole", "Graffiti", "Noise", "No id"],
+        "department": ["PWDx"] * 4,
+        "complaint_text": ["text"] * 4,
+        "sentiment": ["NEGATIVE"] * 4,
+        "priority": [priority, priority, "LOW", priority],
+        "open_dt": ["2021-01-01 10:00:00", "2021-01-02 10:00:00", "not a date", "2021-01-03 10:00:00"]
+    })
+
+
+# the loader connects to the default database (SQLITE_PATH)
+@pytest.fixture
+def pool():
+    pool = get_pool()
+    with pool.connection() as conn:
+        conn.execute("DELETE FROM nlp_complaints")
+        conn.execute("DELETE FROM event_rollups")
+    return pool
+
+
+def high_complaints(pool):
+    return SQLAgent(pool=pool, stats=QueryStats(slow_log=""), use_rollups=True).get_kpi_snapshot(ttl=0).high_complaints
+
+
+def load(rows, batch_size=2):
+    loader = ComplaintLoader(batch_size)
+    loader.load(rows)
+    loader.close()
+    return loader
+
+
+def test_reload_upserts_on_case_id_and_refreshes_rollups(pool, count):
+    loader = load(output())
+    assert loader.skipped == 1
+    assert count(pool, "SELECT COUNT(*) FROM nlp_complaints WHERE created_at IS NULL") == 1
+    assert high_complaints(pool) == 2
+
+    # the same cases again, re-prioritised: updated in place, KPI follows without a manual compact
+    load(output("MEDIUM"))
+    assert count(pool, "SELECT COUNT(*) FROM nlp_complaints") == 3
+    assert count(pool, "SELECT SUM(events) FROM event_rollups WHERE event_table = 'nlp_complaints'") == 3
+    assert high_complaints(pool) == 0
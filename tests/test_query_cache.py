@@ -0,0 +1,147 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from chatbot import query_cache
+from chatbot.query_cache import QueryCache
+
+QUERY = "SELECT city, COUNT(*) total FROM accident_events GROUP BY city"
+
+
+# fake monotonic clock for the cache's TTLs
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(query_cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+class Fetch:
+
+    def __init__(self, df=None):
+        self.df = pd.DataFrame({"city": ["Chennai"], "total": [3]}) if df is None else df
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.df
+
+
+def frame(rows):
+    return pd.DataFrame({"n": range(rows)})
+
+
+def test_hits_until_the_ttl_runs_out(clock):
+    cache, fetch = QueryCache(default_ttl=30), Fetch()
+
+    cache.get_or_fetch(QUERY, fetch)
+    # same SQL up to whitespace / trailing ";"
+    cached = cache.get_or_fetch("  SELECT city, COUNT(*) total\n FROM accident_events GROUP BY city;", fetch)
+    assert fetch.calls == 1 and cache.stats["hits"] == 1
+
+    # callers get copies: changing one doesn't change the cache
+    cached["total"] = 0
+    assert cache.get_or_fetch(QUERY, fetch)["total"].tolist() == [3]
+
+    clock.now += 31
+    cache.get_or_fetch(QUERY, fetch)
+    assert fetch.calls == 2
+
+
+def test_params_and_ttl_zero_bypass(clock):
+    cache, fetch = QueryCache(default_ttl=30), Fetch()
+
+    cache.get_or_fetch(QUERY, fetch, ["High"])
+    cache.get_or_fetch(QUERY, fetch, ["Low"])
+    assert fetch.calls == 2
+
+    cache.get_or_fetch(QUERY, fetch, ["High"], ttl=0)
+    assert fetch.calls == 3 and cache.stats["hits"] == 0
+
+
+def test_least_recently_used_results_go_over_the_byte_cap(clock):
+    size = int(frame(100).memory_usage(deep=True).sum())
+    cache = QueryCache(max_bytes=int(size * 2.5), default_ttl=30)
+
+    for name in ["a", "b"]:
+        cache.get_or_fetch(f"SELECT * FROM {name}", Fetch(frame(100)))
+    cache.get_or_fetch("SELECT * FROM a", Fetch())                     # a is now the most recent
+    cache.get_or_fetch("SELECT * FROM c", Fetch(frame(100)))
+
+    assert cache.stats["evictions"] == 1 and cache.bytes <= cache.max_bytes
+    still = Fetch(frame(100))
+    cache.get_or_fetch("SELECT * FROM a", still)
+    cache.get_or_fetch("SELECT * FROM b", still)
+    assert still.calls == 1                                             # only b was refetched
+
+    # a result bigger than the whole cache is returned but never stored
+    assert len(cache.get_or_fetch("SELECT * FROM big", Fetch(frame(10_000)))) == 10_000
+    assert cache.key("SELECT * FROM big") not in cache._entries
+    assert cache.stats["evictions"] == 2                                # b went when it was refetched
+
+
+def test_errors_are_not_cached(clock):
+    cache = QueryCache(default_ttl=30)
+
+    def failing():
+        raise ConnectionError("DB is down")
+
+    with pytest.raises(ConnectionError):
+        cache.get_or_fetch(QUERY, failing)
+    fetch = Fetch()
+    cache.get_or_fetch(QUERY, fetch)
+    assert fetch.calls == 1
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = QueryCache(default_ttl=30)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return frame(3)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch(QUERY, slow))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    time.sleep(0.05)                    # let the others queue up behind the first fetch
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 8 and all(len(df) == 3 for df in results)
+
+
+def test_invalidate_drops_only_that_tables_results(clock):
+    cache = QueryCache(default_ttl=30)
+    accidents, crowd = Fetch(), Fetch()
+    cache.get_or_fetch(QUERY, accidents)
+    cache.get_or_fetch("SELECT * FROM crowd_events", crowd)
+
+    cache.invalidate("ACCIDENT_EVENTS")
+    cache.get_or_fetch(QUERY, accidents)
+    cache.get_or_fetch("SELECT * FROM crowd_events", crowd)
+    assert accidents.calls == 2 and crowd.calls == 1
+
+
+def test_result_read_before_an_invalidation_is_not_stored(clock):
+    cache = QueryCache(default_ttl=30)
+
+    # a write lands (and invalidates) while this read is still running
+    def racing():
+        cache.invalidate("accident_events")
+        return frame(1)
+
+    cache.get_or_fetch(QUERY, racing)
+    fetch = Fetch()
+    cache.get_or_fetch(QUERY, fetch)
+    assert fetch.calls == 1
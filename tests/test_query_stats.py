@@ -0,0 +1,37 @@
+from chatbot.query_stats import BUCKETS_MS, QueryStats, fingerprint, fingerprint_id
+from chatbot.sql_agent import SQLAgent
+
+
+class FailingPool:
+    size = 1
+
+    def connection(self):
+        raise ConnectionError("DB is down")
+
+
+def test_failed_read_is_counted_and_kept():
+    stats = QueryStats(slow_log="")
+    agent = SQLAgent(pool=FailingPool(), stats=stats)
+    query = "SELECT city FROM accident_events WHERE severity = %s"
+
+    df = agent.fetch_dataframe(query, ["High"], ttl=0)
+
+    assert df.empty
+    row = stats.summary().iloc[0]
+    assert (row["calls"], row["errors"], row["failed"]) == (1, 1, 1)
+    failures = stats.recent_failures()
+    assert failures["id"].tolist() == [fingerprint_id(fingerprint(query))]
+    assert "DB is down" in failures["error"].iloc[0]
+
+
+def test_histogram_buckets_in_numeric_order():
+    stats = QueryStats(slow_log="")
+    for ms in [3, 30, 300, 3000, 30000]:
+        stats.record("SELECT 1", ms / 1000)
+
+    histogram = stats.histogram()
+    assert histogram["upper_ms"].is_monotonic_increasing
+    assert histogram["bucket"].tolist()[:3] == ["≤5ms", "≤10ms", "≤25ms"]
+    assert histogram["queries"].sum() == 5
+    assert histogram["queries"].iloc[-1] == 1
+    assert len(histogram) == len(BUCKETS_MS) + 1
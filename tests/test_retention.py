@@ -0,0 +1,124 @@
+import os
+
+import pandas as pd
+import pymysql
+import pytest
+
+from chatbot.db_pool import Router, get_pool
+from chatbot.query_stats import QueryStats
+from chatbot.retention import _set_archived_before, archive_table, archived_before, read_events
+from chatbot.rollups import ROLLUP_TOTALS_QUERY, compact
+from chatbot.sql_agent import SQLAgent
+
+TABLE = "accident_events"
+
+
+def seed(pool):
+    with pool.connection() as conn:
+        conn.executemany(
+            f"INSERT INTO {TABLE} (city, area, severity, confidence_score, image_name, event_time) VALUES (?, ?, ?, ?, ?, ?)",
+            # January has scores, February's are all NULL, image_name is NULL everywhere
+            [("Chennai", "a", "High", 0.9, None, f"2024-01-{d:02d} 10:00:00") for d in range(1, 11)]
+            + [("Delhi", "b", "Low", None, None, f"2024-02-{d:02d} 10:00:00") for d in range(1, 6)]
+            + [("Delhi", "c", "High", 0.5, None, "2024-06-01 10:00:00")]
+        )
+
+
+# a database of its own (not the default SQLITE_PATH one)
+@pytest.fixture
+def pool(tmp_path):
+    pool = get_pool(str(tmp_path / "events.db"))
+    seed(pool)
+    return pool
+
+
+@pytest.fixture
+def agent(pool):
+    return SQLAgent(pool=pool, stats=QueryStats(slow_log=""))
+
+
+def rollup_total(agent):
+    return int(agent.fetch_dataframe(ROLLUP_TOTALS_QUERY, ttl=0)["total"].sum())
+
+
+def test_archive_keeps_rollups_wherever_compact_runs(agent, pool, tmp_path, monkeypatch):
+    compact([TABLE], pool)
+    assert rollup_total(agent) == 16
+
+    moved = archive_table(TABLE, "2024-03-01 00:00:00", pool, archive_dir=str(tmp_path / "archive"))
+    assert moved == 15
+    assert archived_before(TABLE, pool) == "2024-03-01 00:00:00"
+
+    # another cwd (no archive dir there): the horizon still comes from the DB
+    other = tmp_path / "elsewhere"
+    other.mkdir()
+    monkeypatch.chdir(other)
+    compact([TABLE], pool)
+    assert rollup_total(agent) == 16
+
+
+def test_archive_months_read_back_with_one_schema(agent, pool, tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    archive_table(TABLE, "2024-03-01 00:00:00", pool, archive_dir=archive_dir)
+
+    events = read_events(TABLE, agent=agent, archive_dir=archive_dir)
+    assert len(events) == 16
+    assert events["id"].is_unique
+    assert pd.api.types.is_datetime64_any_dtype(events["event_time"])
+    assert pd.api.types.is_float_dtype(events["confidence_score"])
+
+    old = read_events(TABLE, end="2024-03-01", agent=agent, archive_dir=archive_dir)
+    assert len(old) == 15
+    assert old["confidence_score"].isna().sum() == 5
+    assert set(os.listdir(os.path.join(archive_dir, TABLE))) == {"month=2024-01", "month=2024-02"}
+
+
+def test_horizon_only_moves_forward(pool, tmp_path):
+    archive_table(TABLE, "2024-03-01 00:00:00", pool, archive_dir=str(tmp_path))
+    archive_table(TABLE, "2024-01-15 00:00:00", pool, archive_dir=str(tmp_path))
+    assert archived_before(TABLE, pool) == "2024-03-01 00:00:00"
+
+
+def test_archive_reads_and_deletes_in_the_same_database(pool, tmp_path, count):
+    primary = get_pool()
+    with primary.connection() as conn:
+        conn.execute(f"DELETE FROM {TABLE}")
+        conn.execute("DROP TABLE IF EXISTS archive_horizons")
+    seed(primary)
+    with pool.connection() as conn:
+        conn.execute(f"DELETE FROM {TABLE} WHERE event_time < '2024-02-01'")
+
+    assert archive_table(TABLE, "2024-03-01 00:00:00", pool, archive_dir=str(tmp_path)) == 5
+    assert count(pool, f"SELECT COUNT(*) FROM {TABLE}") == 1
+    assert count(primary, f"SELECT COUNT(*) FROM {TABLE}") == 16
+    assert archived_before(TABLE, primary) is None
+
+
+def test_rows_not_yet_moved_are_still_read(agent, pool, tmp_path, monkeypatch):
+    # the horizon is set, but the run stopped before moving any rows
+    _set_archived_before(TABLE, "2024-03-01 00:00:00", pool)
+    assert len(read_events(TABLE, end="2024-03-01", agent=agent, archive_dir=str(tmp_path))) == 15
+
+    # a failed hot read is an error, not "archived rows only"
+    def down(*args):
+        raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+    monkeypatch.setattr(agent, "_read", down)
+    with pytest.raises(pymysql.err.OperationalError):
+        read_events(TABLE, end="2024-03-01", agent=agent, archive_dir=str(tmp_path))
+
+
+def test_read_events_sees_each_shards_archive(tmp_path, insert_accidents):
+    chennai, delhi = str(tmp_path / "chennai.db"), str(tmp_path / "delhi.db")
+    # ids 1..4 on both shards
+    insert_accidents(get_pool(chennai), [("Chennai", "a", "High", f"2024-0{m}-01 10:00:00") for m in range(1, 5)])
+    insert_accidents(get_pool(delhi), [("Delhi", "b", "High", f"2024-0{m}-01 10:00:00") for m in range(1, 5)])
+    router = Router(primary=chennai, read_hosts=[], shards={"Delhi": delhi})
+    agent = SQLAgent(router=router, stats=QueryStats(slow_log=""))
+
+    # only Delhi's shard has been archived so far
+    archive_dir = str(tmp_path / "archive")
+    assert archive_table(TABLE, "2024-03-01 00:00:00", get_pool(delhi), archive_dir=archive_dir) == 2
+
+    events = read_events(TABLE, agent=agent, archive_dir=archive_dir)
+    assert sorted(zip(events["city"], events["id"])) == [("Chennai", i) for i in range(1, 5)] + [("Delhi", i) for i in range(1, 5)]
+    assert len(read_events(TABLE, end="2024-03-01", agent=agent, archive_dir=archive_dir)) == 4
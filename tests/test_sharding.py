@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+from chatbot.db_pool import Router, get_pool
+from chatbot.event_writer import EventWriter
+from chatbot.query_stats import QueryStats
+from chatbot.sql_agent import CHATBOT_MERGES, CHATBOT_QUERIES, ShardMerge, SQLAgent, merge_shards
+
+
+# two SQLite files as shards: Delhi on its own file, every other city on the primary
+@pytest.fixture
+def hosts(tmp_path):
+    return str(tmp_path / "primary.db"), str(tmp_path / "delhi.db")
+
+
+@pytest.fixture
+def router(hosts):
+    primary, delhi = hosts
+    return Router(primary=primary, read_hosts=[], shards={"Delhi": delhi})
+
+
+def test_router_routes_writes_and_fans_out_sharded_reads(router, hosts):
+    primary, delhi = hosts
+    assert router.sharded
+    assert router.write_host("Delhi") == delhi
+    assert router.write_host("Chennai") == primary
+    assert router.write_pool("Delhi") is get_pool(delhi)
+    assert router.shard_hosts() == [primary, delhi]
+
+    assert router.read_pools(["accident_events"]) == [get_pool(primary), get_pool(delhi)]
+    assert router.read_pools(["complaint_hotspots"]) == [get_pool(primary)]
+
+
+def test_replica_reads_rotate(hosts, tmp_path):
+    primary, _ = hosts
+    replicas = [str(tmp_path / "replica-1.db"), str(tmp_path / "replica-2.db")]
+    router = Router(primary=primary, read_hosts=replicas, shards={})
+
+    picked = [router.read_pools(["accident_events"])[0] for _ in range(4)]
+    assert picked == [get_pool(replicas[0]), get_pool(replicas[1])] * 2
+    assert router.write_pool("Chennai") is get_pool(primary)
+
+
+def test_merge_shards_applies_order_and_limit_again():
+    a = pd.DataFrame({"city": ["Chennai"] * 3, "event_time": ["10:05", "10:03", "10:01"]})
+    b = pd.DataFrame({"city": ["Delhi"] * 3, "event_time": ["10:04", "10:02", "10:00"]})
+
+    merged = merge_shards([a, b], ShardMerge((("event_time", False),), 4))
+    assert merged["event_time"].tolist() == ["10:05", "10:04", "10:03", "10:02"]
+
+    # no merge given: rows are only appended (aggregates grouped by city)
+    assert len(merge_shards([a, b])) == 6
+    assert merge_shards([a.head(0), b.head(0)]).empty
+
+
+def test_chatbot_merges_match_their_queries():
+    assert CHATBOT_MERGES.keys() == CHATBOT_QUERIES.keys()
+    for name, merge in CHATBOT_MERGES.items():
+        (column, ascending), = merge.order_by
+        assert CHATBOT_QUERIES[name].endswith(f"ORDER BY {column} {'ASC' if ascending else 'DESC'} LIMIT {merge.limit}")
+
+
+def test_sharded_read_is_merged_across_files(router, hosts, insert_accidents):
+    primary, delhi = hosts
+    insert_accidents(get_pool(primary), [("Chennai", "a", "High", f"2024-01-01 10:{2 * i:02d}:00") for i in range(8)])
+    insert_accidents(get_pool(delhi), [("Delhi", "b", "High", f"2024-01-01 10:{2 * i + 1:02d}:00") for i in range(8)])
+    agent = SQLAgent(router=router, stats=QueryStats(slow_log=""))
+
+    df = agent.fetch_dataframe(CHATBOT_QUERIES["accident"], ttl=0, merge=CHATBOT_MERGES["accident"])
+    assert df["event_time"].tolist() == [f"2024-01-01 10:{m:02d}:00" for m in range(15, 5, -1)]
+    assert set(df["city"]) == {"Chennai", "Delhi"}
+
+
+def test_event_writer_writes_each_city_to_its_shard(router, hosts, tmp_path, count):
+    primary, delhi = hosts
+    writer = EventWriter(
+        write_behind=False, router=router,
+        spill_path=str(tmp_path / "spill.jsonl"), dead_letter_path=str(tmp_path / "dead.jsonl")
+    )
+    row = {"area": "x", "latitude": 0.0, "longitude": 0.0, "severity": "High", "confidence_score": 0.5, "image_name": "a.jpg"}
+    writer._flush([
+        ("accident_events", ["Delhi"] + list(row.values()) + ["2024-01-01 10:00:00"]),
+        ("accident_events", ["Chennai"] + list(row.values()) + ["2024-01-01 10:00:00"]),
+        ("accident_events", ["Delhi"] + list(row.values()) + ["2024-01-01 10:00:00"])
+    ])
+
+    assert count(get_pool(delhi), "SELECT COUNT(*) FROM accident_events WHERE city = 'Delhi'") == 2
+    assert count(get_pool(primary), "SELECT COUNT(*) FROM accident_events WHERE city = 'Chennai'") == 1
+    assert count(get_pool(primary), "SELECT COUNT(*) FROM accident_events WHERE city = 'Delhi'") == 0
+    # rollups travel with their events
+    assert count(get_pool(delhi), "SELECT SUM(events) FROM event_rollups") == 2
+    assert writer.stats["written"] == 3
+
+
+def test_streams_read_where_the_agent_routes(router, hosts, tmp_path, insert_accidents):
+    primary, delhi = hosts
+    insert_accidents(get_pool(primary), [("Chennai", "a", "High", "2024-01-01 10:00:00")] * 3)
+    insert_accidents(get_pool(delhi), [("Delhi", "b", "High", "2024-01-01 10:00:00")] * 2)
+    query = "SELECT city FROM accident_events"
+
+    def streamed(agent):
+        return sorted(pd.concat(agent.stream_dataframe(query, chunk_size=2))["city"])
+
+    stats = QueryStats(slow_log="")
+    assert streamed(SQLAgent(router=router, stats=stats)) == ["Chennai"] * 3 + ["Delhi"] * 2
+    assert streamed(SQLAgent(pool=get_pool(delhi), stats=stats)) == ["Delhi"] * 2
+
+    replica = str(tmp_path / "replica.db")
+    insert_accidents(get_pool(replica), [("Mumbai", "c", "High", "2024-01-01 10:00:00")])
+    replicated = Router(primary=primary, read_hosts=[replica], shards={})
+    assert streamed(SQLAgent(router=replicated, stats=stats)) == ["Mumbai"]